@@ -1,5 +1,38 @@
+import importlib
+import logging
+import os
+import time
 import streamlit as st
-from pages import homepage, survey_page, scores, visualizations, create_project_page
+from utils.memprofile import start_memory_profiler
+from utils.metrics import start_exporter
+
+logger = logging.getLogger(__name__)
+
+# Page modules are imported the first time they are routed to, so serving the
+# homepage does not load neo4j, opencage or the plotting stack. Each entry maps
+# a page name to (module, entry function).
+PAGES = {
+    "Home": ("pages.homepage", "app"),
+    "Create Project": ("pages.create_project_page", "app"),  # Add the new page here
+    "Survey form": ("pages.survey_page", "initiate_survey"),
+    "Generate Scores": ("pages.scores", "app"),
+    "Visualizations": ("pages.visualizations", "app")
+}
+
+# Seconds a page module may take to import before a warning is logged
+PAGE_IMPORT_BUDGET = float(os.getenv('PAGE_IMPORT_BUDGET', '1.0'))
+
+def load_page(name):
+    module_name, entry = PAGES.get(name, PAGES["Home"])
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    # Only the first import is timed meaningfully; later calls hit sys.modules
+    if elapsed > PAGE_IMPORT_BUDGET:
+        logger.warning("Importing %s took %.2fs (budget %.2fs)", module_name, elapsed, PAGE_IMPORT_BUDGET)
+    else:
+        logger.debug("Imported %s in %.3fs", module_name, elapsed)
+    return getattr(module, entry)
 
 def setup_page():
     st.set_page_config(page_title="Homepage", layout='wide')
@@ -19,23 +52,17 @@ def setup_page():
 
 def main():
     setup_page()
+    start_exporter()  # Serves /metrics when METRICS_PORT is set
+    start_memory_profiler()  # Samples tracemalloc when MEMPROFILE_INTERVAL is set
     query_params = st.query_params  # Use st.query_params to get query parameters
-    page = query_params.get("page", ["Home"])[0]  # Default to Home if no page is specified
+    page = query_params.get("page", "Home")  # Default to Home if no page is specified
     survey_id = query_params.get("id", None)  # Check if there is an 'id' query parameter
 
-    PAGES = {
-        "Home": homepage,
-        "Create Project": create_project_page,  # Add the new page here
-        "Survey form": survey_page,
-        "Generate Scores": scores,
-        "Visualizations": visualizations
-    }
-
     if survey_id:
-        survey_page.app(survey_id[0])  # Assuming survey_page.app can handle an ID
+        # Survey links carry the projectID; the survey page reads it from the query string
+        load_page("Survey form")()
     else:
-        page_app = PAGES.get(page, homepage)
-        page_app.app()
+        load_page(page)()
 
 if __name__ == "__main__":
     main()
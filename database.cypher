@@ -104,3 +104,27 @@ MERGE (challengeOrigin)-[:FACTORS_INTO]->(contextScore)-[:FACTORS_INTO]->(impact
 MERGE (resources)-[:FACTORS_INTO]->(contextScore)
 MERGE (diversity)-[:FACTORS_INTO]->(contextScore)
 MERGE (alignmentSurvey)-[:FACTORS_INTO]->(alignmentScore);
+
+// Point index for map and "projects near me" lookups (see utils/geo.py)
+CREATE POINT INDEX project_coordinates IF NOT EXISTS
+FOR (project:Project) ON (project.coordinates);
+
+// Backfill coordinates for projects that only have latitude/longitude
+MATCH (project:Project)
+WHERE project.coordinates IS NULL
+  AND project.latitude IS NOT NULL
+  AND project.longitude IS NOT NULL
+SET project.coordinates = point({latitude: project.latitude, longitude: project.longitude});
+
+// projectID and response_id are time-ordered ULIDs (see utils/unique_id.py), so
+// new IDs append to the end of these range indexes and recent activity can be
+// read with a range scan, e.g. WHERE project.projectID >= $since_ulid
+CREATE RANGE INDEX project_id IF NOT EXISTS
+FOR (project:Project) ON (project.projectID);
+
+CREATE RANGE INDEX survey_response_id IF NOT EXISTS
+FOR (survey:Survey) ON (survey.response_id);
+
+// Optional cross-server reservation of new IDs (reserve_ulid)
+CREATE CONSTRAINT reserved_id_unique IF NOT EXISTS
+FOR (reserved:ReservedID) REQUIRE reserved.id IS UNIQUE;
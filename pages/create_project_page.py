@@ -3,9 +3,12 @@ import json
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 import streamlit as st
-from utils.unique_id import generate_unique_id
+from utils.unique_id import generate_ulid
 from opencage.geocoder import OpenCageGeocode, RateLimitExceededError
 import pyperclip
+from utils.metrics import InstrumentedDriver, InstrumentedGeocoder, instrument_page
+from utils.project_filter import remember_project_id
+from utils.project_lookup import remember_project
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,8 +19,8 @@ uri = os.getenv('NEO4J_URI')
 user = os.getenv('NEO4J_USER')
 password = os.getenv('NEO4J_PASSWORD')
 
-geocoder = OpenCageGeocode(api_key)
-driver = GraphDatabase.driver(uri, auth=(user, password))
+geocoder = InstrumentedGeocoder(OpenCageGeocode(api_key))
+driver = InstrumentedDriver(GraphDatabase.driver(uri, auth=(user, password)))
 
 def create_project_in_db(tx, project_data):
     query = """
@@ -29,16 +32,21 @@ def create_project_in_db(tx, project_data):
         location: $location, 
         latitude: $latitude, 
         longitude: $longitude, 
+        coordinates: CASE
+            WHEN $latitude IS NULL OR $longitude IS NULL THEN null
+            ELSE point({latitude: $latitude, longitude: $longitude})
+        END,
         leadership: $leadership
     })
     """
     tx.run(query, **project_data)
 
+@instrument_page("create_project")
 def app():
     st.title("Create Project and Initiate Survey")
 
     if 'projectID' not in st.session_state:
-        st.session_state.projectID = generate_unique_id(12)
+        st.session_state.projectID = generate_ulid()
 
     # Initialize session state variables for this page if not already set
     if 'project_name' not in st.session_state:
@@ -97,6 +105,8 @@ def app():
             project_data["leadership"] = json.dumps(project_data["leadership"])
             with driver.session() as session:
                 session.execute_write(create_project_in_db, project_data)
+            remember_project_id(project_data["projectID"])
+            remember_project(project_data["projectID"], project_data["title"])
             st.success("Project data saved successfully!")
             st.write("Your Unique Project ID:", st.session_state.projectID)
             st.warning("Please save this ID for future reference.")
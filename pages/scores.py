@@ -1,5 +1,97 @@
+import os
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
 import streamlit as st
 from time import sleep
+from utils.metrics import InstrumentedDriver, count_cache_miss, count_cache_request, instrument_page
+from utils.percentiles import ALL_PROJECTS, get_percentile_service
+from utils.project_scores import SCORES_CACHE_ENTRIES, SCORES_TTL, project_responses, project_scores, scores_version
+from utils.svg_badge import render_svg_badge
+from utils.unique_id import normalize_id
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Get the values from environment variables
+uri = os.getenv('NEO4J_URI')
+user = os.getenv('NEO4J_USER')
+password = os.getenv('NEO4J_PASSWORD')
+
+driver = InstrumentedDriver(GraphDatabase.driver(uri, auth=(user, password)))
+
+# `version` is only part of the cache key; submit_survey bumps it so a new
+# response is never answered from the cache
+@st.cache_data(ttl=SCORES_TTL, max_entries=SCORES_CACHE_ENTRIES)
+def load_project_scores(projectID, version):
+    count_cache_miss("project_scores")
+    with driver.session() as session:
+        return session.execute_read(project_scores, projectID)
+
+@st.cache_data(ttl=SCORES_TTL, max_entries=SCORES_CACHE_ENTRIES)
+def load_project_responses(projectID, version):
+    count_cache_miss("project_responses")
+    with driver.session() as session:
+        return session.execute_read(project_responses, projectID)
+
+def cohort_options():
+    # Sectors to compare against; only the whole cohort if they cannot be loaded
+    try:
+        return [ALL_PROJECTS] + get_percentile_service(driver).cohorts()
+    except Exception:
+        return [ALL_PROJECTS]
+
+def category_percentile(category, score, cohort):
+    if score is None:
+        return None
+    try:
+        percentile = get_percentile_service(driver).percentile(category, score, cohort)
+    except Exception:
+        return None
+    return None if percentile is None else round(percentile)
+
+def show_scores(projectID, scores, cohort=ALL_PROJECTS):
+    st.subheader(f"Scores for {projectID}")
+    st.metric("Respondents", scores["respondents"])
+    if not scores["respondents"]:
+        st.info("No surveys have been submitted for this project yet.")
+        return
+    st.write("Category scores (average across respondents)")
+    st.dataframe(
+        [{"category": category[:-len("_score")].replace("_", " ").title(), "score": score,
+          f"percentile among {cohort or 'all'} projects": category_percentile(category, score, cohort)}
+         for category, score in scores["categories"].items()],
+        hide_index=True,
+    )
+    with st.expander("Category scores by respondent"):
+        try:
+            count_cache_request("project_responses")
+            st.dataframe(load_project_responses(projectID, scores_version(projectID)), hide_index=True)
+        except Exception as e:
+            st.error(f"Could not load responses: {e}")
+    st.write("Dimension scores (latest response)")
+    st.dataframe(
+        [{"dimension": dimension.replace("_", " ").title(), "score": score}
+         for dimension, score in scores["dimensions"].items()],
+        hide_index=True,
+    )
+    show_badge(projectID, scores["badge"])
+
+def show_badge(projectID, badge_data):
+    # Cache misses are drawn in the render pool, off the script thread. The
+    # plotting stack is imported on first use to keep the page quick to open.
+    from utils.badge import render_badge
+    try:
+        png = render_badge(badge_data)
+        svg = render_svg_badge(badge_data)
+    except Exception as e:
+        st.error(f"Could not render badge: {e}")
+        return
+    st.image(png, caption="CEnTR*IMPACT badge")
+    png_column, svg_column = st.columns(2)
+    png_column.download_button("Download badge (PNG)", png, file_name=f"{projectID}_badge.png", mime="image/png")
+    svg_column.download_button("Download badge (SVG)", svg, file_name=f"{projectID}_badge.svg", mime="image/svg+xml")
+
+@instrument_page("scores")
 def app():
     st.title('Check and Generate Scores')
 
@@ -8,10 +100,22 @@ def app():
 
     if have_id == 'Yes':
         unique_id = st.text_input("Please enter your unique ID:")
+        cohort = st.selectbox("Compare with", cohort_options(), format_func=lambda cohort: f"{cohort} projects" if cohort else "All projects")
         if st.button('Retrieve Scores'):
-            # Placeholder for the logic to retrieve and display scores based on the unique ID
-            st.write("Scores for ID:", unique_id)
-            # Actual implementation would involve fetching data from a database or server
+            unique_id = normalize_id(unique_id)
+            if not unique_id:
+                st.error("Please enter a unique ID to retrieve scores")
+            else:
+                try:
+                    count_cache_request("project_scores")
+                    scores = load_project_scores(unique_id, scores_version(unique_id))
+                except Exception as e:
+                    st.error(f"Could not load scores: {e}")
+                else:
+                    if scores is None:
+                        st.error("Invalid Unique ID. Please check your ID or initiate a new survey.")
+                    else:
+                        show_scores(unique_id, scores, cohort)
 
     st.header("Want to know your score?")
     want_score = st.radio("Would you like to calculate your score now?", ('Yes', 'No'))
@@ -2,12 +2,18 @@ import os
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 import streamlit as st
-from utils.unique_id import generate_unique_id
+from utils.unique_id import generate_ulid, normalize_id
 from opencage.geocoder import OpenCageGeocode
 from opencage.geocoder import RateLimitExceededError
 from streamlit_sortables import sort_items
 import json
-from scipy.stats import gmean
+from utils.survey_response import SurveyResponse
+from utils.calculations import calculate_ripple, calculate_sortable_score, degree_ripple
+from utils.metrics import InstrumentedDriver, InstrumentedGeocoder, instrument_page
+from utils.project_filter import get_project_id_filter
+from utils.project_lookup import get_project_lookup
+from utils.project_scores import invalidate_project_scores
+from utils.percentiles import survey_submitted
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,93 +24,31 @@ uri = os.getenv('NEO4J_URI')
 user = os.getenv('NEO4J_USER')
 password = os.getenv('NEO4J_PASSWORD')
 
-geocoder = OpenCageGeocode(api_key)
-driver = GraphDatabase.driver(uri, auth=(user, password))
-
-multipliers = [
-    (1, "(1)"),
-    (0.95, "(0.95)"),
-    (0.90, "(0.90)"),
-    (0.84, "(0.84)"),
-    (0.78, "(0.78)")
-]
+geocoder = InstrumentedGeocoder(OpenCageGeocode(api_key))
+driver = InstrumentedDriver(GraphDatabase.driver(uri, auth=(user, password)))
 
 def check_unique_id(tx, projectID):
     query = "MATCH (project:Project {projectID: $projectID}) RETURN project"
     result = tx.run(query, projectID=projectID)
     return result.single() is not None
 
-def calculate_sortable_score(items, multipliers):
-    score = 0
-    for i, item in enumerate(items):
-        for weight, text in multipliers:
-            if text in item:
-                score += weight * (1 - 0.05 * i)
-    return score / 4.027
+# Each dimension is its own fragment, so dragging an item only reruns that
+# sortable and its score instead of the whole page. Category totals are
+# recalculated when the respondent moves on.
+@st.experimental_fragment
+def sortable_dimension(dimension, title, items):
+    st.subheader(title)
+    sorted_items = sort_items([
+        {'header': 'Does Not Describe My Project', 'items': items},
+        {'header': 'Describes My Project', 'items': []}
+    ], multi_containers=True, direction="vertical", key=f"{dimension}_sortable")
+    st.session_state.response.update(**{f"{dimension}_score": calculate_sortable_score(sorted_items[1]['items'])})
 
 def initialize_session_state():
     if 'page' not in st.session_state:
         st.session_state.page = 0
-    if 'projectID' not in st.session_state:
-        st.session_state.projectID = ''
-    if 'project_name' not in st.session_state:
-        st.session_state.project_name = ''
-    if 'partners' not in st.session_state:
-        st.session_state.partners = []
-    if 'selected_scores' not in st.session_state:
-        st.session_state.selected_scores = []
-    if 'direct_indicator_preferences' not in st.session_state:
-        st.session_state.direct_indicator_preferences = {}
-    if 'challenge_origin_score' not in st.session_state:
-        st.session_state.challenge_origin_score = 0
-    if 'diversity_score' not in st.session_state:
-        st.session_state.diversity_score = 0
-    if 'resources_score' not in st.session_state:
-        st.session_state.resources_score = 0
-    if 'beneficence_score' not in st.session_state:
-        st.session_state.beneficence_score = 0
-    if 'reflection_score' not in st.session_state:
-        st.session_state.reflection_score = 0
-    if 'decision_making_score' not in st.session_state:
-        st.session_state.decision_making_score = 0
-    if 'tool_construction_score' not in st.session_state:
-        st.session_state.tool_construction_score = 0
-    if 'trust_score' not in st.session_state:
-        st.session_state.trust_score = 0
-    if 'duration_score' not in st.session_state:
-        st.session_state.duration_score = 0
-    if 'frequency_score' not in st.session_state:
-        st.session_state.frequency_score = 0
-    if 'research_questions_score' not in st.session_state:
-        st.session_state.research_questions_score = 0
-    if 'design_facilitation_score' not in st.session_state:
-        st.session_state.design_facilitation_score = 0
-    if 'voice_score' not in st.session_state:
-        st.session_state.voice_score = 0
-    if 'reciprocity_score' not in st.session_state:
-        st.session_state.reciprocity_score = 0
-    if 'civic_learning_score' not in st.session_state:
-        st.session_state.civic_learning_score = 0
-    if 'critical_reflection_score' not in st.session_state:
-        st.session_state.critical_reflection_score = 0
-    if 'integration_score' not in st.session_state:
-        st.session_state.integration_score = 0
-    if 'goals_met_score' not in st.session_state:
-        st.session_state.goals_met_score = 0
-    if 'outputs_delivered_score' not in st.session_state:
-        st.session_state.outputs_delivered_score = 0
-    if 'capacities_capabilities_score' not in st.session_state:
-        st.session_state.capacities_capabilities_score = 0
-    if 'sustainability_score' not in st.session_state:
-        st.session_state.sustainability_score = 0
-    if 'response_id' not in st.session_state:
-        st.session_state.response_id = ''
-    if 'first_degree' not in st.session_state:
-        st.session_state.first_degree = {}
-    if 'second_degree' not in st.session_state:
-        st.session_state.second_degree = {}
-    if 'third_degree' not in st.session_state:
-        st.session_state.third_degree = {}
+    if 'response' not in st.session_state:
+        st.session_state.response = SurveyResponse()
 
 def initiate_survey():
     initialize_session_state()
@@ -123,68 +67,98 @@ def initiate_survey():
     elif st.session_state.page == 5:
         page_5()
 
+def suggest_projects(method, text):
+    # Suggestions are a convenience; the prompt still works while the index is
+    # being built or cannot be built
+    lookup = get_project_lookup(driver)
+    if lookup is None:
+        return []
+    return getattr(lookup, method)(text)
+
+def choose_project(projectID):
+    st.session_state.response.projectID = projectID
+    st.session_state.pop("id_suggestions", None)
+    st.session_state.page = 1
+    st.rerun()
+
+@instrument_page("ask_for_unique_id")
 def ask_for_unique_id():
     st.header("Enter your projectID to continue")
-    unique_id = st.text_input("projectID")
+    unique_id = st.text_input("projectID", value=st.query_params.get("id", ""))
 
     if st.button("Continue"):
-        if unique_id:
+        unique_id = normalize_id(unique_id)
+        st.session_state.id_suggestions = []
+        if unique_id and not get_project_id_filter(driver).might_exist(unique_id):
+            st.error("Invalid Unique ID. Please check your ID or initiate a new survey.")
+            st.session_state.id_suggestions = suggest_projects("search_id", unique_id)
+        elif unique_id:
             with driver.session() as session:
                 try:
                     exists = session.execute_read(check_unique_id, unique_id)
                     if exists:
-                        st.session_state.projectID = unique_id
-                        st.session_state.page = 1
-                        st.rerun()
+                        choose_project(unique_id)
                     else:
                         st.error("Invalid Unique ID. Please check your ID or initiate a new survey.")
+                        st.session_state.id_suggestions = suggest_projects("search_id", unique_id)
                 except Exception as e:
                     st.error(f"An error occurred while checking the unique ID: {e}")
         else:
             st.error("Please enter a unique ID to continue")
 
+    title = st.text_input("Don't have the projectID? Search by project title")
+    suggestions = suggest_projects("search_title", title) if title else st.session_state.get("id_suggestions", [])
+    if suggestions:
+        st.write("Did you mean one of these projects?")
+        for candidate in suggestions:
+            if st.button(f"{candidate['title'] or 'Untitled project'} ({candidate['projectID']})", key=f"suggestion_{candidate['projectID']}"):
+                # Candidates come from Neo4j, so no further check is needed
+                choose_project(candidate["projectID"])
+    elif title:
+        st.info("No projects match that title.")
+
+@instrument_page("page_1")
 def page_1():
     st.title("Project Alignment Survey - Page 1")
+    response = st.session_state.response
+    connections = ["Research Team", "Community", "Institutional Partner"]
 
     with st.form("page_1"):
-        st.session_state.project_name = st.text_input("Project Name")
+        project_name = st.text_input("Project Name", response.project_name)
         
         st.subheader("Connection to the Project")
-        st.session_state.connection = st.selectbox("How are you connected to the project?", ["Research Team", "Community", "Institutional Partner"])
+        connection = st.selectbox("How are you connected to the project?", connections, index=connections.index(response.connection) if response.connection in connections else 0)
 
         st.subheader("The research team and the partners were aligned in terms of:")
-        st.session_state.alignment_goals = st.slider("The Goals and Purposes of the project", 0.0, 1.0, 0.5)
-        st.session_state.alignment_values = st.slider("The Values and Ideals that guide the project", 0.0, 1.0, 0.5)
-        st.session_state.alignment_roles = st.slider("Setting the Roles and Responsibilities between the research team and the community partners", 0.0, 1.0, 0.5)
-        st.session_state.alignment_resources = st.slider("Managing the Resources that move the project forward", 0.0, 1.0, 0.5)
-        st.session_state.alignment_activities = st.slider("Designing and Facilitating the Activities and Events for the good of the community in the project", 0.0, 1.0, 0.5)
-        st.session_state.alignment_culture = st.slider("Empowering the Culture, Knowledge and Language of the community in the work of the project", 0.0, 1.0, 0.5)
-        st.session_state.alignment_outputs = st.slider("The types of Outputs such as workshops and events, news stories, policy documents, and academic articles and presentations", 0.0, 1.0, 0.5)
-        st.session_state.alignment_outcomes = st.slider("The Outcomes of the project in terms of short-term and long-term changes", 0.0, 1.0, 0.5)
+        alignment = {
+            "alignment_goals": st.slider("The Goals and Purposes of the project", 0.0, 1.0, response.alignment_goals),
+            "alignment_values": st.slider("The Values and Ideals that guide the project", 0.0, 1.0, response.alignment_values),
+            "alignment_roles": st.slider("Setting the Roles and Responsibilities between the research team and the community partners", 0.0, 1.0, response.alignment_roles),
+            "alignment_resources": st.slider("Managing the Resources that move the project forward", 0.0, 1.0, response.alignment_resources),
+            "alignment_activities": st.slider("Designing and Facilitating the Activities and Events for the good of the community in the project", 0.0, 1.0, response.alignment_activities),
+            "alignment_culture": st.slider("Empowering the Culture, Knowledge and Language of the community in the work of the project", 0.0, 1.0, response.alignment_culture),
+            "alignment_outputs": st.slider("The types of Outputs such as workshops and events, news stories, policy documents, and academic articles and presentations", 0.0, 1.0, response.alignment_outputs),
+            "alignment_outcomes": st.slider("The Outcomes of the project in terms of short-term and long-term changes", 0.0, 1.0, response.alignment_outcomes),
+        }
 
         next_page = st.form_submit_button("Next")
 
     if next_page:
+        response.update(project_name=project_name, connection=connection, **alignment)
         st.session_state.page = 2
         st.rerun()
 
+@instrument_page("page_2")
 def page_2():
     st.title("Project Alignment Survey - Page 2")
 
     # Initialize all required session state variables
     st.header("Please select the scores you would like to include in your report.")
-    st.session_state.selected_scores = st.multiselect("Select Scores", ["Direct Indicator Scores", "Project Impact Scores", "Alignment Scores", "Ripple Effect Scores"], default=st.session_state.get('selected_scores', []))
-
-    multipliers = [
-        (1, "(1)"),
-        (0.95, "(0.95)"),
-        (0.90, "(0.90)"),
-        (0.84, "(0.84)"),
-        (0.78, "(0.78)")
-    ]
+    response = st.session_state.response
+    selected_scores = st.multiselect("Select Scores", ["Direct Indicator Scores", "Project Impact Scores", "Alignment Scores", "Ripple Effect Scores"], default=response.selected_scores)
+    response.update(selected_scores=selected_scores)
 
     # Define the questions and their weights
-    st.subheader("Challenge Origin")
     challenge_origin_items = [
         "The Research Team identified the challenge or issue (0.78)",
         "The Community identified the challenge or issue (0.95)",
@@ -192,13 +166,8 @@ def page_2():
         "The Research Team refined the challenge or issue (0.84)",
         "The Community refined the challenge or issue (0.90)"
     ]
-    st.session_state.challenge_origin = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': challenge_origin_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.challenge_origin_score = calculate_sortable_score(st.session_state.challenge_origin[1]['items'], multipliers)
+    sortable_dimension("challenge_origin", "Challenge Origin", challenge_origin_items)
 
-    st.subheader("Diversity")
     diversity_items = [
         "The Research Team is diverse in multiple ways and represents a range of identities (0.78)",
         "The Community is diverse in multiple ways and represents a range of identities (0.84)",
@@ -206,13 +175,8 @@ def page_2():
         "Underrepresented and/or marginalized identities are a part of the Community (0.95)",
         "There are overlaps in identity memberships between the Research Team and the Community (1)"
     ]
-    st.session_state.diversity = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': diversity_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.diversity_score = calculate_sortable_score(st.session_state.diversity[1]['items'], multipliers)
+    sortable_dimension("diversity", "Diversity", diversity_items)
 
-    st.subheader("Resources")
     resources_items = [
         "All resources were provided by the Research Team (0.84)",
         "The Research Team contributed resources (0.90)",
@@ -220,13 +184,8 @@ def page_2():
         "The Community contributed resources (0.95)",
         "All resources were provided by the Community (0.78)"
     ]
-    st.session_state.resources = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': resources_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.resources_score = calculate_sortable_score(st.session_state.resources[1]['items'], multipliers)
+    sortable_dimension("resources", "Resources", resources_items)
 
-    st.subheader("Trust")
     trust_items = [
         "Despite a history of mistrust, the Research Team reached out to the Community (0.90)",
         "Building on a history of trust and collaboration, the Research Team reached out to the Community (0.78)",
@@ -234,13 +193,8 @@ def page_2():
         "Building on a history of trust and collaboration, the Community reached out to the Research Team (0.84)",
         "Despite a history of mistrust, the Community reached out to the Research Team (0.95)"
     ]
-    st.session_state.trust = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': trust_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.trust_score = calculate_sortable_score(st.session_state.trust[1]['items'], multipliers)
+    sortable_dimension("trust", "Trust", trust_items)
 
-    st.subheader("Beneficence")
     beneficence_items = [
         "The Research Team benefitted from the processes (0.78)",
         "The Community Partners benefitted from the processes (0.90)",
@@ -248,13 +202,8 @@ def page_2():
         "Benefits built upon and strengthened the Community’s cultural capital and wealth and agency (0.95)",
         "Benefits aligned with the goals and purposes of the project (0.84)"
     ]
-    st.session_state.beneficence = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': beneficence_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.beneficence_score = calculate_sortable_score(st.session_state.beneficence[1]['items'], multipliers)
+    sortable_dimension("beneficence", "Beneficence", beneficence_items)
 
-    st.subheader("Reflection")
     reflection_items = [
         "The Research Team engaged in and benefitted from intentional reflection activities (0.78)",
         "Community partners engaged in and benefitted from intentional reflection activities (0.84)",
@@ -262,13 +211,8 @@ def page_2():
         "Lessons learned for all participants were identified through intentional reflection activities (0.90)",
         "Strategies and new practices were developed through intentional reflection activities (0.95)"
     ]
-    st.session_state.reflection = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': reflection_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.reflection_score = calculate_sortable_score(st.session_state.reflection[1]['items'], multipliers)
+    sortable_dimension("reflection", "Reflection", reflection_items)
 
-    st.subheader("Decision Making")
     decision_making_items = [
         "The Research Team contributed to the decision making processes (0.78)",
         "Community Partners contributed to the decision making processes (0.84)",
@@ -276,13 +220,8 @@ def page_2():
         "Decision making processes recognized and supported the community’s cultural capital and agency (0.95)",
         "Decisions were made to align with the goals and purposes of the project (0.90)"
     ]
-    st.session_state.decision_making = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': decision_making_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.decision_making_score = calculate_sortable_score(st.session_state.decision_making[1]['items'], multipliers)
+    sortable_dimension("decision_making", "Decision Making", decision_making_items)
 
-    st.subheader("Tool Construction")
     tool_construction_items = [
         "Promoted Efficiency (0.84)",
         "The Research Team contributed to building the tools (0.78)",
@@ -290,13 +229,10 @@ def page_2():
         "Made processes more clear and understandable (0.95)",
         "The Community contributed to building the tools (0.90)"
     ]
-    st.session_state.tool_construction = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': tool_construction_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.tool_construction_score = calculate_sortable_score(st.session_state.tool_construction[1]['items'], multipliers)
+    sortable_dimension("tool_construction", "Tool Construction", tool_construction_items)
 
     if st.button("Next"):
+        response.update_category_scores()
         st.session_state.page = 3
         st.rerun()
     
@@ -304,18 +240,11 @@ def page_2():
         st.session_state.page = 1
         st.rerun()
 
+@instrument_page("page_3")
 def page_3():
     st.title("Project Alignment Survey - Page 3")
+    response = st.session_state.response
 
-    multipliers = [
-        (1, "(1)"),
-        (0.95, "(0.95)"),
-        (0.90, "(0.90)"),
-        (0.84, "(0.84)"),
-        (0.78, "(0.78)")
-    ]
-
-    st.subheader("Duration")
     duration_items = [
         "A Week or Less (0.78)",
         "A Month or Less (0.84)",
@@ -323,13 +252,8 @@ def page_3():
         "A Year or Less (0.95)",
         "Multiple Years (1)"
     ]
-    st.session_state.duration = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': duration_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.duration_score = calculate_sortable_score(st.session_state.duration[1]['items'], multipliers)
+    sortable_dimension("duration", "Duration", duration_items)
 
-    st.subheader("Frequency")
     frequency_items = [
         "Once (0.78)",
         "More than once (0.84)",
@@ -337,13 +261,8 @@ def page_3():
         "At least Weekly (0.95)",
         "Daily or more (1)"
     ]
-    st.session_state.frequency = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': frequency_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.frequency_score = calculate_sortable_score(st.session_state.frequency[1]['items'], multipliers)
+    sortable_dimension("frequency", "Frequency", frequency_items)
 
-    st.subheader("Research Questions")
     research_questions_items = [
         "The Research Team contributed to the research question or questions to be explored (0.78)",
         "The Community contributed to the research question or questions to be explored (0.95)",
@@ -351,13 +270,8 @@ def page_3():
         "The research question or questions were designed to align with the goals and purposes of the project (0.84)",
         "The research question or questions provided opportunities to generate new understandings for the discipline(s) of the Research Team and to benefit the Community (1)"
     ]
-    st.session_state.research_questions = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': research_questions_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.research_questions_score = calculate_sortable_score(st.session_state.research_questions[1]['items'], multipliers)
+    sortable_dimension("research_questions", "Research Questions", research_questions_items)
 
-    st.subheader("Design and Facilitation")
     design_facilitation_items = [
         "The Research Team contributed to the design and facilitation of interventions and research (0.78)",
         "The Community contributed to the design and facilitation of interventions and research (0.95)",
@@ -365,13 +279,8 @@ def page_3():
         "The design and facilitation of interventions and research aligned with the goals and purposes of the project (0.84)",
         "The design and facilitation of interventions and research provided opportunities to generate new understandings for the discipline(s) and to benefit the Community (1)"
     ]
-    st.session_state.design_facilitation = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': design_facilitation_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.design_facilitation_score = calculate_sortable_score(st.session_state.design_facilitation[1]['items'], multipliers)
+    sortable_dimension("design_facilitation", "Design and Facilitation", design_facilitation_items)
 
-    st.subheader("Voice")
     voice_items = [
         "Materials and Events utilized Academic Language (0.78)",
         "Materials and Events utilized Community-Centered Language (0.90)",
@@ -379,13 +288,8 @@ def page_3():
         "Materials and Events were fit specifically for local settings (0.95)",
         "Materials and Events were culture-centered activities (1)"
     ]
-    st.session_state.voice = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': voice_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.voice_score = calculate_sortable_score(st.session_state.voice[1]['items'], multipliers)
+    sortable_dimension("voice", "Voice", voice_items)
 
-    st.subheader("Reciprocity")
     reciprocity_items = [
         "Expectations around Community benefit and Student learning are included in the course syllabus (0.78)",
         "Student accountability to the Community and Community benefit are shared with Students (0.84)",
@@ -393,13 +297,8 @@ def page_3():
         "Activities are co-constructed by the Instructor, Community, and Students that benefit the Community and enrich Student learning (0.95)",
         "There is ongoing collaboration between the Community, the Instructor, and Students in all phases of the project or engaged experience (1)"
     ]
-    st.session_state.reciprocity = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': reciprocity_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.reciprocity_score = calculate_sortable_score(st.session_state.reciprocity[1]['items'], multipliers)
+    sortable_dimension("reciprocity", "Reciprocity", reciprocity_items)
 
-    st.subheader("Civic Learning")
     civic_learning_items = [
         "Civic learning expectations and outcomes are included in the course syllabus (0.78)",
         "There is an alignment across the syllabus, the activities, and the assessments to ensure civic learning is a measured component of the course (0.9)",
@@ -407,13 +306,8 @@ def page_3():
         "Opportunities are offered for meaning-making and making connections between civic learning and academic work in the course (0.95)",
         "Opportunities are offered for meaning-making and making connections between civic learning and real-world contexts (1)"
     ]
-    st.session_state.civic_learning = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': civic_learning_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.civic_learning_score = calculate_sortable_score(st.session_state.civic_learning[1]['items'], multipliers)
+    sortable_dimension("civic_learning", "Civic Learning", civic_learning_items)
 
-    st.subheader("Critical Reflection")
     critical_reflection_items = [
         "Expectations for critical reflection is built into the course requirements and are stated in the syllabus (0.78)",
         "There are ongoing critical reflection activities with scaffolding that allow deepened reflections on engaged experiences (0.84)",
@@ -421,26 +315,16 @@ def page_3():
         "Critical reflection activities are used to enhance course content (0.95)",
         "Critical reflection activities are used to deepen collaborative relationships with the Community (1)"
     ]
-    st.session_state.critical_reflection = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': critical_reflection_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.critical_reflection_score = calculate_sortable_score(st.session_state.critical_reflection[1]['items'], multipliers)
+    sortable_dimension("critical_reflection", "Critical Reflection", critical_reflection_items)
 
-    st.subheader("Integration")
     integration_items = [
         "Relationships and dynamics between the Instructor, the Community, and the Students are similar to the relationships and dynamics of the broader research project (0.84)",
         "The Community is included in the decision making around the inclusion of engaged learning in the broader research project (0.9)",
         "Students’ engagement activities with the Community support research and intervention activities by building capacities and capabilities and/or generating useful understandings and/or practices (0.95)",
         "Course artifacts and outputs support research and intervention activities by building capacities and capabilities and/or generating useful understandings and/or practices (1)"
     ]
-    st.session_state.integration = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': integration_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.integration_score = calculate_sortable_score(st.session_state.integration[1]['items'], multipliers)
+    sortable_dimension("integration", "Integration", integration_items)
 
-    st.subheader("Goals Met")
     goals_met_items = [
         "Entirely for the Research Team (1)",
         "Mostly for the Research Team, some for the Community (0.95)",
@@ -448,13 +332,8 @@ def page_3():
         "Mostly for the Community, some for the Research Team (0.84)",
         "Entirely for the Community (0.78)"
     ]
-    st.session_state.goals_met = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': goals_met_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.goals_met_score = calculate_sortable_score(st.session_state.goals_met[1]['items'], multipliers)
+    sortable_dimension("goals_met", "Goals Met", goals_met_items)
 
-    st.subheader("Outputs Delivered")
     outputs_delivered_items = [
         "Academic Outputs that Benefit the Research Team (0.78)",
         "Academic Outputs that Advance the Field (0.84)",
@@ -462,13 +341,8 @@ def page_3():
         "Community-Based Outputs that Reach Broader Community Members and Institutions (1)",
         "Academic and/or Community-Based Outputs in a Range of Venues (0.95)"
     ]
-    st.session_state.outputs_delivered = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': outputs_delivered_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.outputs_delivered_score = calculate_sortable_score(st.session_state.outputs_delivered[1]['items'], multipliers)
+    sortable_dimension("outputs_delivered", "Outputs Delivered", outputs_delivered_items)
 
-    st.subheader("Capacities and Capabilities Strengthened")
     capacities_capabilities_items = [
         "Participant and/or Community well-being (0.90)",
         "Participant and/or Community agency (1)",
@@ -476,13 +350,8 @@ def page_3():
         "The distribution of opportunity and/or attainment (0.84)",
         "The fabric and cohesion of the Community (0.95)"
     ]
-    st.session_state.capacities_capabilities = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': capacities_capabilities_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.capacities_capabilities_score = calculate_sortable_score(st.session_state.capacities_capabilities[1]['items'], multipliers)
+    sortable_dimension("capacities_capabilities", "Capacities and Capabilities Strengthened", capacities_capabilities_items)
 
-    st.subheader("Sustainability")
     sustainability_items = [
         "Trust and respect in partnership (0.84)",
         "Available resources (0.78)",
@@ -490,34 +359,19 @@ def page_3():
         "Concrete strategies for further engagement (0.90)",
         "Infrastructures for further engagement (0.95)"
     ]
-    st.session_state.sustainability = sort_items([
-        {'header': 'Does Not Describe My Project', 'items': sustainability_items},
-        {'header': 'Describes My Project', 'items': []}
-    ], multi_containers=True, direction="vertical")
-    st.session_state.sustainability_score = calculate_sortable_score(st.session_state.sustainability[1]['items'], multipliers)
-    
-    s1 = st.session_state.challenge_origin_score + st.session_state.diversity_score + st.session_state.trust_score + st.session_state.resources_score
-    s2 = st.session_state.beneficence_score + st.session_state.reflection_score + st.session_state.decision_making_score + st.session_state.tool_construction_score
-    s3 = st.session_state.duration_score + st.session_state.frequency_score + st.session_state.research_questions_score + st.session_state.design_facilitation_score
-    s4 = st.session_state.reciprocity_score + st.session_state.civic_learning_score + st.session_state.critical_reflection_score + st.session_state.integration_score
-    s5 = st.session_state.goals_met_score + st.session_state.outputs_delivered_score + st.session_state.capacities_capabilities_score + st.session_state.sustainability_score
-    
-    st.session_state.context_score = s1
-    st.session_state.processes_score = s2
-    st.session_state.interventions_and_research_score = s3
-    st.session_state.engaged_learners_score = s4
-    st.session_state.outcomes_score = s5 
+    sortable_dimension("sustainability", "Sustainability", sustainability_items)
     
     
     #DEBUG SCORES
-    # st.write("context score: ", st.session_state.context_score)  
-    # st.write("processes score: ", st.session_state.processes_score)
-    # st.write("interventions and research score: ", st.session_state.interventions_and_research_score)
-    # st.write("engaged learners score: ", st.session_state.engaged_learners_score)
-    # st.write("outcomes score: ", st.session_state.outcomes_score)
+    # st.write("context score: ", response.context_score)  
+    # st.write("processes score: ", response.processes_score)
+    # st.write("interventions and research score: ", response.interventions_and_research_score)
+    # st.write("engaged learners score: ", response.engaged_learners_score)
+    # st.write("outcomes score: ", response.outcomes_score)
     
     
     if st.button("Next"):
+        response.update_category_scores()
         st.session_state.page = 4
         st.rerun()
 
@@ -525,29 +379,68 @@ def page_3():
         st.session_state.page = 2
         st.rerun()
 
+def ripple_preview(response):
+    ripple = degree_ripple(response.first_degree, response.second_degree, response.third_degree)
+    st.subheader("Ripple Preview")
+    st.dataframe(
+        [{"Degree": source["group_name"], "People": row["values"], "Ripple Score": row["ripple_score"], "Share (%)": row["adj_score"]}
+         for source, row in zip(ripple, calculate_ripple(ripple))],
+        hide_index=True,
+    )
+
+def seed_widget(widget_key, value):
+    # Seed through session state rather than `value=` so the widget keeps the
+    # same identity after its answer is saved back to the response
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = value
+    return widget_key
+
+def count_input(label, response, degree, key):
+    # Whole, non-negative counts are enforced by the browser before the form is sent
+    value = int(getattr(response, degree).get(key, 0))
+    return st.number_input(label, min_value=0, step=1, key=seed_widget(f"{degree}_{key}", value))
+
+def likelihood_slider(label, response, degree, key):
+    value = getattr(response, degree).get(key, 0.5)
+    return st.slider(label, 0.0, 0.90, key=seed_widget(f"{degree}_{key}", value))
+
+@instrument_page("page_4")
 def page_4():
     st.title("Project Alignment Survey")
+    response = st.session_state.response
+
+    # The whole page is sent as one update when a form button is pressed
+    with st.form("first_second_degree"):
+        first_degree = {}
+        second_degree = {}
+
+        st.subheader("FIRST DEGREE")
+        first_degree['number_of_research_team_members'] = count_input("How many Faculty Members were a part of the Research Team?", response, 'first_degree', 'number_of_research_team_members')
+        first_degree['number_of_staff_members'] = count_input("How many Staff Members were a part of the Research Team?", response, 'first_degree', 'number_of_staff_members')
+        first_degree['number_of_student_assistants'] = count_input("How many Student Assistants (research assistants, etc.) were a part of the Research Team?", response, 'first_degree', 'number_of_student_assistants')
+        first_degree['number_of_students'] = count_input("How many Students (service learning, etc.) contributed to the project?", response, 'first_degree', 'number_of_students')
+        first_degree['number_of_core_community_members'] = count_input("How many individual Core Community Members contributed to the Project?", response, 'first_degree', 'number_of_core_community_members')
+        first_degree['community_institution_contribution'] = count_input("Number Representatives of Community Institutions contributed to the Project", response, 'first_degree', 'community_institution_contribution')
+
+        st.subheader("SECOND DEGREE")
+        st.write("Please answer the following realistically.")
+        second_degree['faculty_influence'] = count_input("How many people can Faculty Members influence based on their transformation by participating in the project?", response, 'second_degree', 'faculty_influence')
+        second_degree['staff_influence'] = count_input("How many people can Staff Members influence based on their transformation by participating in the project?", response, 'second_degree', 'staff_influence')
+        second_degree['student_assistants_influence'] = count_input("How many people can Student Assistants influence based on their transformation by participating in the project?", response, 'second_degree', 'student_assistants_influence')
+        second_degree['students_influence'] = count_input("How many people can Students influence based on their transformation by participating in the project?", response, 'second_degree', 'students_influence')
+        second_degree['core_community_members_influence'] = count_input("How many people can Core Community Members influence based on their transformation by participating in the project?", response, 'second_degree', 'core_community_members_influence')
+        second_degree['community_institution_influence'] = count_input("How many people can Representatives of Community Institutions influence based on their transformation by participating in the project?", response, 'second_degree', 'community_institution_influence')
+        second_degree['within_group_likelihood'] = likelihood_slider("How likely is it that any member within a group influenced by the same person will be connected to someone else within the same group?", response, 'second_degree', 'within_group_likelihood')
+        second_degree['outside_group_likelihood'] = likelihood_slider("How likely is it that any member of any group will be connected to someone outside their group?", response, 'second_degree', 'outside_group_likelihood')
+
+        preview = st.form_submit_button("Preview")
+        next_page = st.form_submit_button("Next")
 
-    st.subheader("FIRST DEGREE")
-    st.session_state.first_degree['number_of_research_team_members'] = st.number_input("How many Faculty Members were a part of the Research Team?")
-    st.session_state.first_degree['number_of_staff_members'] = st.number_input("How many Staff Members were a part of the Research Team?")
-    st.session_state.first_degree['number_of_student_assistants'] = st.number_input("How many Student Assistants (research assistants, etc.) were a part of the Research Team?")
-    st.session_state.first_degree['number_of_students'] = st.number_input("How many Students (service learning, etc.) contributed to the project?")
-    st.session_state.first_degree['number_of_core_community_members'] = st.number_input("How many individual Core Community Members contributed to the Project?")
-    st.session_state.first_degree['community_institution_contribution'] = st.number_input("Number Representatives of Community Institutions contributed to the Project")
-
-    st.subheader("SECOND DEGREE")
-    st.write("Please answer the following realistically.")
-    st.session_state.second_degree['faculty_influence'] = st.number_input("How many people can Faculty Members influence based on their transformation by participating in the project?")
-    st.session_state.second_degree['staff_influence'] = st.number_input("How many people can Staff Members influence based on their transformation by participating in the project?")
-    st.session_state.second_degree['student_assistants_influence'] = st.number_input("How many people can Student Assistants influence based on their transformation by participating in the project?")
-    st.session_state.second_degree['students_influence'] = st.number_input("How many people can Students influence based on their transformation by participating in the project?")
-    st.session_state.second_degree['core_community_members_influence'] = st.number_input("How many people can Core Community Members influence based on their transformation by participating in the project?")
-    st.session_state.second_degree['community_institution_influence'] = st.number_input("How many people can Representatives of Community Institutions influence based on their transformation by participating in the project?")
-    st.session_state.second_degree['within_group_likelihood'] = st.slider("How likely is it that any member within a group influenced by the same person will be connected to someone else within the same group?", 0.0, 0.90, 0.5)
-    st.session_state.second_degree['outside_group_likelihood'] = st.slider("How likely is it that any member of any group will be connected to someone outside their group?", 0.0, 0.90, 0.5)
-
-    if st.button("Next"):
+    if preview or next_page:
+        response.update(first_degree=first_degree, second_degree=second_degree)
+    if preview:
+        ripple_preview(response)
+    if next_page:
         st.session_state.page = 5
         st.rerun()
 
@@ -555,24 +448,36 @@ def page_4():
         st.session_state.page = 3
         st.rerun()
 
+@instrument_page("page_5")
 def page_5():
     st.title("Project Alignment Survey - Third Degree")
-
-    st.write("Please answer the following realistically.")
-    st.session_state.third_degree['faculty_further_influence'] = st.number_input("How many people can those influenced by Faculty Members further influence?")
-    st.session_state.third_degree['staff_further_influence'] = st.number_input("How many people can those influenced by Staff Members further influence?")
-    st.session_state.third_degree['student_assistants_further_influence'] = st.number_input("How many people can those influenced by Student Assistants further influence?")
-    st.session_state.third_degree['students_further_influence'] = st.number_input("How many people can Students influence based on their transformation by participating in the project?")
-    st.session_state.third_degree['core_community_members_further_influence'] = st.number_input("How many people can those influenced by Core Community Members further influence?")
-    st.session_state.third_degree['community_institution_further_influence'] = st.number_input("How many people can those influenced by Representatives of Community Institutions further influence?")
-    st.session_state.third_degree['within_group_likelihood'] = st.slider("How likely is it that any member within a group influenced by the same person will be connected to someone else within the same group?", 0.0, 0.90, 0.5)
-    st.session_state.third_degree['outside_group_likelihood'] = st.slider("How likely is it that any member of any group will be connected to someone outside their group?", 0.0, 0.90, 0.5)
+    response = st.session_state.response
+
+    with st.form("third_degree"):
+        st.write("Please answer the following realistically.")
+        third_degree = {}
+        third_degree['faculty_further_influence'] = count_input("How many people can those influenced by Faculty Members further influence?", response, 'third_degree', 'faculty_further_influence')
+        third_degree['staff_further_influence'] = count_input("How many people can those influenced by Staff Members further influence?", response, 'third_degree', 'staff_further_influence')
+        third_degree['student_assistants_further_influence'] = count_input("How many people can those influenced by Student Assistants further influence?", response, 'third_degree', 'student_assistants_further_influence')
+        third_degree['students_further_influence'] = count_input("How many people can Students influence based on their transformation by participating in the project?", response, 'third_degree', 'students_further_influence')
+        third_degree['core_community_members_further_influence'] = count_input("How many people can those influenced by Core Community Members further influence?", response, 'third_degree', 'core_community_members_further_influence')
+        third_degree['community_institution_further_influence'] = count_input("How many people can those influenced by Representatives of Community Institutions further influence?", response, 'third_degree', 'community_institution_further_influence')
+        third_degree['within_group_likelihood'] = likelihood_slider("How likely is it that any member within a group influenced by the same person will be connected to someone else within the same group?", response, 'third_degree', 'within_group_likelihood')
+        third_degree['outside_group_likelihood'] = likelihood_slider("How likely is it that any member of any group will be connected to someone outside their group?", response, 'third_degree', 'outside_group_likelihood')
+
+        preview = st.form_submit_button("Preview")
+        submit = st.form_submit_button("Submit")
+
+    if preview or submit:
+        response.update(third_degree=third_degree)
+    if preview:
+        ripple_preview(response)
     
     
-    st.write("Your Unique response ID:", st.session_state.response_id)
+    st.write("Your Unique response ID:", response.response_id)
     st.warning("Please save this ID for future reference.")
 
-    if st.button("Submit"):
+    if submit:
         submit_survey()
     
     if st.button("Previous"):
@@ -580,56 +485,11 @@ def page_5():
         st.rerun()
 
 def submit_survey():
-    if 'response_id' not in st.session_state or not st.session_state.response_id:
-        st.session_state.response_id = generate_unique_id(12)
-
-    preferences = {
-        "unique_id": st.session_state.projectID,
-        "project_name": st.session_state.project_name,
-        "partners": json.dumps(st.session_state.partners),  # Ensure partners is a JSON string
-        "score_visualizations": json.dumps(st.session_state.selected_scores),  # Ensure score_visualizations is a JSON string
-        "direct_indicator_preferences": json.dumps(st.session_state.direct_indicator_preferences),  # Convert to JSON string
-        "challenge_origin_score": st.session_state.challenge_origin_score,
-        "diversity_score": st.session_state.diversity_score,
-        "resources_score": st.session_state.resources_score,
-        "beneficence_score": st.session_state.beneficence_score,
-        "reflection_score": st.session_state.reflection_score,
-        "decision_making_score": st.session_state.decision_making_score,
-        "tool_construction_score": st.session_state.tool_construction_score,
-        "trust_score": st.session_state.trust_score,
-        "duration_score": st.session_state.duration_score,
-        "frequency_score": st.session_state.frequency_score,
-        "research_questions_score": st.session_state.research_questions_score,
-        "design_facilitation_score": st.session_state.design_facilitation_score,
-        "voice_score": st.session_state.voice_score,
-        "reciprocity_score": st.session_state.reciprocity_score,
-        "civic_learning_score": st.session_state.civic_learning_score,
-        "critical_reflection_score": st.session_state.critical_reflection_score,
-        "integration_score": st.session_state.integration_score,
-        "goals_met_score": st.session_state.goals_met_score,
-        "outputs_delivered_score": st.session_state.outputs_delivered_score,
-        "capacities_capabilities_score": st.session_state.capacities_capabilities_score,
-        "sustainability_score": st.session_state.sustainability_score,
-        "projectID": st.session_state.projectID,  # Ensure projectID is included
-        "context_score": st.session_state.context_score,
-        "processes_score": st.session_state.processes_score,
-        "interventions_and_research_score": st.session_state.interventions_and_research_score,
-        "engaged_learners_score": st.session_state.engaged_learners_score,
-        "outcomes_score": st.session_state.outcomes_score,
-        "response_id": st.session_state.response_id,  # Add response ID
-        "connection": st.session_state.connection,
-        "alignment_goals": st.session_state.alignment_goals,
-        "alignment_values": st.session_state.alignment_values,
-        "alignment_roles": st.session_state.alignment_roles,
-        "alignment_resources": st.session_state.alignment_resources,
-        "alignment_activities": st.session_state.alignment_activities,
-        "alignment_culture": st.session_state.alignment_culture,
-        "alignment_outputs": st.session_state.alignment_outputs,
-        "alignment_outcomes": st.session_state.alignment_outcomes,
-        "first_degree": json.dumps(st.session_state.first_degree),
-        "second_degree": json.dumps(st.session_state.second_degree),
-        "third_degree": json.dumps(st.session_state.third_degree)
-    }
+    response = st.session_state.response
+    if not response.response_id:
+        response.response_id = generate_ulid()
+
+    preferences = response.to_db_payload()
 
     # Print types for debugging
     for key, value in preferences.items():
@@ -637,6 +497,8 @@ def submit_survey():
 
     with driver.session() as session:
         session.execute_write(create_survey_in_db, preferences)
+    invalidate_project_scores(response.projectID)
+    survey_submitted()
 
     st.success("Survey Saved Successfully!")
 
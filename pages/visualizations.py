@@ -1,53 +1,117 @@
+import os
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-
-def create_sector_bar_chart():
-    sectors = ["Health", "Education", "Governance", "Ecology", "Nutrition", "Development"]
-    values = np.random.randint(10, 100, size=len(sectors))
-
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x=sectors, y=values, palette="viridis")
-    plt.title("Project Sector Involvement")
-    plt.xlabel("Sectors")
-    plt.ylabel("Involvement Level")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    return plt
-
-def create_engagement_pie_chart():
-    labels = ['Daily', 'Weekly', 'Monthly', 'Yearly']
-    sizes = np.random.randint(100, 1000, size=len(labels))
-
-    plt.figure(figsize=(8, 8))
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=sns.color_palette("muted", n_colors=4))
-    plt.title("Frequency of Engagement")
-    return plt
-
-def create_engagement_line_graph():
-    months = range(1, 13)  # Months of the year
-    engagement_hours = np.random.randint(1, 50, size=len(months))
-
-    plt.figure(figsize=(10, 6))
-    sns.lineplot(x=months, y=engagement_hours, marker='o', color='b')
-    plt.title("Engagement Hours Over Time")
-    plt.xlabel("Month")
-    plt.ylabel("Engagement Hours")
-    plt.grid(True)
-    return plt
+import pyarrow as pa
+from utils import charts
+from utils.arrow_io import SURVEY_SCHEMA, query_to_dataframe, return_properties
+from utils.calculations import CATEGORY_PROPERTIES
+from utils.geo import cluster_projects, project_cluster_deck
+from utils.metrics import InstrumentedDriver, count_cache_miss, count_cache_request, instrument_page
 
+# Load environment variables from .env file
+load_dotenv()
+
+# Get the values from environment variables
+uri = os.getenv('NEO4J_URI')
+user = os.getenv('NEO4J_USER')
+password = os.getenv('NEO4J_PASSWORD')
+
+driver = InstrumentedDriver(GraphDatabase.driver(uri, auth=(user, password)))
+
+# Seconds before aggregate query results are fetched again
+CACHE_TTL = 600
+
+def sector_counts(tx):
+    query = """
+    MATCH (project:Project)-[:ALIGNED_WITH]->(sector:Sector)
+    WHERE sector.type IS NOT NULL
+    RETURN sector.type AS sector, count(DISTINCT project) AS projects
+    ORDER BY sector
+    """
+    return [(record["sector"], record["projects"]) for record in tx.run(query)]
+
+def connection_counts(tx):
+    query = """
+    MATCH (survey:Survey)
+    WHERE survey.connection IS NOT NULL
+    RETURN survey.connection AS connection, count(survey) AS responses
+    ORDER BY connection
+    """
+    return [(record["connection"], record["responses"]) for record in tx.run(query)]
+
+def engagement_hours_by_month(tx):
+    query = """
+    MATCH (project:Project)
+    WHERE project.startDate IS NOT NULL
+    WITH date.truncate('month', date(project.startDate)) AS month, project
+    RETURN toString(month) AS month, sum(coalesce(project.engagementHours, 0)) AS hours
+    ORDER BY month
+    """
+    return [(record["month"], record["hours"]) for record in tx.run(query)]
+
+CATEGORY_SCORE_SCHEMA = pa.schema([SURVEY_SCHEMA.field(property_name) for _, property_name in CATEGORY_PROPERTIES])
+
+def category_score_quartiles(tx):
+    # Every response is loaded into Arrow columns and reduced here, so only
+    # five rows are cached and charted
+    query = f"MATCH (survey:Survey) RETURN {return_properties('survey', CATEGORY_SCORE_SCHEMA)}"
+    frame = query_to_dataframe(tx, query, CATEGORY_SCORE_SCHEMA)
+    quartiles = frame.quantile([0, 0.25, 0.5, 0.75, 1])
+    return [
+        (category_name, *[float(value) for value in quartiles[property_name]])
+        for category_name, property_name in CATEGORY_PROPERTIES
+        if frame[property_name].notna().any()
+    ]
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_aggregate(name):
+    count_cache_miss("aggregates")
+    queries = {
+        "sectors": sector_counts,
+        "connections": connection_counts,
+        "engagement_hours": engagement_hours_by_month,
+        "category_scores": category_score_quartiles,
+    }
+    with driver.session() as session:
+        return session.execute_read(queries[name])
+
+@st.cache_data(ttl=CACHE_TTL)
+def load_project_clusters(zoom):
+    count_cache_miss("project_clusters")
+    with driver.session() as session:
+        return session.execute_read(cluster_projects, zoom)
+
+def show_chart(title, name, build_chart, empty_message):
+    st.subheader(title)
+    try:
+        count_cache_request("aggregates")
+        rows = load_aggregate(name)
+    except Exception as e:
+        st.error(f"Could not load data: {e}")
+        return
+    if not rows:
+        st.info(empty_message)
+        return
+    st.altair_chart(build_chart(rows), use_container_width=True)
+
+@instrument_page("visualizations")
 def app():
     st.title('Visualization Dashboard')
 
-    st.subheader("Project Sector Involvement Bar Chart")
-    st.pyplot(create_sector_bar_chart())
-
-    st.subheader("Frequency of Engagement Pie Chart")
-    st.pyplot(create_engagement_pie_chart())
+    show_chart("Project Sector Involvement Bar Chart", "sectors", charts.sector_bar_chart, "No projects are aligned with a sector yet.")
+    show_chart("Survey Respondents Pie Chart", "connections", charts.engagement_pie_chart, "No survey responses yet.")
+    show_chart("Engagement Hours Over Time Line Graph", "engagement_hours", charts.engagement_line_graph, "No projects with a start date yet.")
+    show_chart("Survey Category Scores Box Plot", "category_scores", charts.category_box_plot, "No survey responses yet.")
 
-    st.subheader("Engagement Hours Over Time Line Graph")
-    st.pyplot(create_engagement_line_graph())
+    st.subheader("Project Locations")
+    zoom = st.slider("Map zoom", 1, 12, 3)
+    try:
+        count_cache_request("project_clusters")
+        clusters = load_project_clusters(zoom)
+        st.pydeck_chart(project_cluster_deck(clusters, zoom))
+    except Exception as e:
+        st.error(f"Could not load project locations: {e}")
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+from utils.badge_cache import BADGE_CACHE_DIR, badge_cache_key, badge_cache_path
+from utils.calculations import CATEGORY_PROPERTIES, project_badge_data
+
+# Regenerate badges for a whole portfolio:
+#   python -m scripts.batch_badges --sector "Public Health and Wellness" --workers 8
+# Badges whose content hash already exists in the cache are skipped, so nightly
+# runs only render projects whose scores changed.
+
+# Load environment variables from .env file
+load_dotenv()
+
+def portfolio_projects(tx, sector=None, institution=None):
+    score_properties = ", ".join(f".{property_name}" for _, property_name in CATEGORY_PROPERTIES)
+    query = f"""
+    MATCH (project:Project)
+    WHERE project.projectID IS NOT NULL
+      AND project.context_score IS NOT NULL
+      AND ($sector IS NULL OR EXISTS {{ (project)-[:ALIGNED_WITH]->(:Sector {{type: $sector}}) }})
+      AND ($institution IS NULL OR EXISTS {{ (:Institution {{name: $institution}})-[:PARTNERS_IN]->(project) }})
+    RETURN project.projectID AS projectID,
+           coalesce(project.title, project.project_name) AS title,
+           project {{{score_properties}, .direct_indicator_preferences}} AS scores
+    """
+    # Yield while the result streams so the portfolio is never held in memory
+    for record in tx.run(query, sector=sector, institution=institution):
+        yield record["projectID"], record["title"], record["scores"]
+
+def render_to_cache(layout, fmt, badge_data):
+    # Runs in a worker process; imports the plotting stack only there, and not
+    # at all for SVG badges, which are written from templates
+    if layout == "badge" and fmt == "svg":
+        from utils.svg_badge import render_svg_badge
+        render_svg_badge(badge_data)
+        return
+    # The worker is the pool here, so render_badge draws in place
+    from utils.badge import render_badge
+    render_badge(badge_data, layout, fmt, pool=False)
+
+def write_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def run(driver, layout="badge", fmt="png", sector=None, institution=None, workers=None, manifest_path=None):
+    workers = workers or os.cpu_count() or 1
+    manifest_path = manifest_path or os.path.join(BADGE_CACHE_DIR, "manifest.json")
+    entries = []
+    pending = deque()
+    # Projects with identical scores share a badge, so render each key once per run
+    queued = {}
+
+    def collect(limit):
+        # Keep at most `limit` renders queued so memory stays flat for large portfolios
+        while len(pending) > limit:
+            entry, future = pending.popleft()
+            queued.pop(entry["key"], None)
+            try:
+                future.result()
+                entry["status"] = "rendered"
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        with driver.session() as session, session.begin_transaction() as tx:
+            for project_id, title, scores in portfolio_projects(tx, sector, institution):
+                badge_data = project_badge_data(scores)
+                key = badge_cache_key(badge_data, layout)
+                path = badge_cache_path(key, fmt)
+                entry = {"projectID": project_id, "title": title, "key": key, "path": path}
+                entries.append(entry)
+                if os.path.exists(path):
+                    entry["status"] = "unchanged"
+                    continue
+                if key not in queued:
+                    queued[key] = executor.submit(render_to_cache, layout, fmt, badge_data)
+                pending.append((entry, queued[key]))
+                collect(workers * 4)
+        collect(0)
+
+    manifest = {
+        "generated": datetime.now(timezone.utc).isoformat(),
+        "layout": layout,
+        "format": fmt,
+        "filters": {"sector": sector, "institution": institution},
+        "projects": entries,
+    }
+    write_manifest(manifest_path, manifest)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Render CEnTR*IMPACT badges for every project in a portfolio.")
+    parser.add_argument("--sector", help="Only projects aligned with this Sector type")
+    parser.add_argument("--institution", help="Only projects this Institution partners in")
+    parser.add_argument("--layout", choices=["badge", "dashboard"], default="badge")
+    parser.add_argument("--format", dest="fmt", choices=["png", "svg"], default="png")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--manifest", default=None, help="Manifest path (default: <cache dir>/manifest.json)")
+    args = parser.parse_args()
+
+    uri = os.getenv('NEO4J_URI')
+    user = os.getenv('NEO4J_USER')
+    password = os.getenv('NEO4J_PASSWORD')
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    try:
+        manifest = run(driver, args.layout, args.fmt, args.sector, args.institution, args.workers, args.manifest)
+    finally:
+        driver.close()
+
+    statuses = [entry["status"] for entry in manifest["projects"]]
+    print(f"{len(statuses)} projects: {statuses.count('rendered')} rendered, "
+          f"{statuses.count('unchanged')} unchanged, {statuses.count('failed')} failed")
+
+if __name__ == "__main__":
+    main()
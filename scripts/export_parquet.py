@@ -0,0 +1,59 @@
+import argparse
+import os
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+from utils.arrow_io import DEFAULT_BATCH_SIZE, PROJECT_SCHEMA, SURVEY_SCHEMA, record_batches, return_properties, write_parquet
+
+# Bulk export for analysts:
+#   python -m scripts.export_parquet outputs/export --batch-size 50000
+# writes projects.parquet and surveys.parquet with one typed column per
+# property. Results are fetched and written one batch at a time, so memory
+# stays bounded however many nodes there are.
+
+# Load environment variables from .env file
+load_dotenv()
+
+EXPORTS = {
+    "projects": (
+        f"MATCH (project:Project) WHERE project.projectID IS NOT NULL RETURN {return_properties('project', PROJECT_SCHEMA)}",
+        PROJECT_SCHEMA,
+    ),
+    "surveys": (
+        f"MATCH (survey:Survey) RETURN {return_properties('survey', SURVEY_SCHEMA)}",
+        SURVEY_SCHEMA,
+    ),
+}
+
+def export(driver, name, path, batch_size=DEFAULT_BATCH_SIZE):
+    query, schema = EXPORTS[name]
+    # The fetch size keeps the driver from buffering more than one batch ahead
+    with driver.session(fetch_size=batch_size) as session, session.begin_transaction() as tx:
+        return write_parquet(path, schema, record_batches(tx.run(query), schema, batch_size))
+
+def run(driver, output_dir, names=None, batch_size=DEFAULT_BATCH_SIZE):
+    return {
+        name: export(driver, name, os.path.join(output_dir, f"{name}.parquet"), batch_size)
+        for name in names or EXPORTS
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Project and Survey nodes to Parquet.")
+    parser.add_argument("output_dir", nargs="?", default=os.path.join("outputs", "export"))
+    parser.add_argument("--only", choices=list(EXPORTS), action="append", help="Export only this node type (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Records per Arrow batch and Parquet row group")
+    args = parser.parse_args()
+
+    uri = os.getenv('NEO4J_URI')
+    user = os.getenv('NEO4J_USER')
+    password = os.getenv('NEO4J_PASSWORD')
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    try:
+        counts = run(driver, args.output_dir, args.only, args.batch_size)
+    finally:
+        driver.close()
+
+    for name, rows in counts.items():
+        print(f"{rows} {name} written to {os.path.join(args.output_dir, name + '.parquet')}")
+
+if __name__ == "__main__":
+    main()
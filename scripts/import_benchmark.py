@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold import time and memory of app.py and each page, each measured in a
+# fresh interpreter:
+#   python -m scripts.import_benchmark --runs 5
+# Streamlit itself is imported before timing starts, since a running server
+# already has it loaded; what is measured is the cost of routing to a page for
+# the first time. Exits non-zero when a module goes over its budget.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module: (seconds, MiB) measured after Streamlit is loaded
+BUDGETS = {
+    "app": (0.1, 10),
+    "pages.homepage": (0.05, 5),
+    "pages.create_project_page": (0.75, 150),
+    "pages.survey_page": (0.75, 150),
+    "pages.scores": (0.75, 150),
+    "pages.visualizations": (1.0, 175),
+}
+
+# Runs in the child interpreter. Page modules declare Streamlit components at
+# import, which needs a runtime, so a mock one is installed first as AppTest does.
+CHILD = """
+import json, resource, sys, time
+import streamlit, streamlit.runtime
+from unittest.mock import MagicMock
+from streamlit.runtime import Runtime
+Runtime._instance = MagicMock(spec=Runtime)
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print("--- start ---", file=sys.stderr, flush=True)
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+scale = 1 if sys.platform == "darwin" else 1024
+print(json.dumps({{"seconds": seconds, "rss_bytes": (rss_after - rss_before) * scale}}))
+"""
+
+def parse_importtime(stderr, top):
+    # `-X importtime` lines look like "import time: self | cumulative | <indent>name";
+    # direct dependencies of the measured module are indented by two spaces
+    dependencies = {}
+    started = False
+    for line in stderr.splitlines():
+        if line.startswith("--- start ---"):
+            started = True
+            continue
+        if not started or not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name[1:]
+        if name.startswith("  ") and not name.startswith("   "):
+            dependencies[name.strip()] = int(cumulative) / 1e6
+    return sorted(dependencies.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def measure(module, top=5):
+    env = dict(os.environ)
+    # Pages open their Neo4j driver and geocoder at import; neither connects until used
+    env.setdefault('NEO4J_URI', 'bolt://localhost:7687')
+    env.setdefault('OPEN_CAGE_API_KEY', 'import-benchmark')
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(module=module)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    measured["dependencies"] = parse_importtime(result.stderr, top)
+    return measured
+
+def run(modules=None, runs=3, budget_scale=1.0, top=5):
+    report = []
+    for module in modules or BUDGETS:
+        samples = [measure(module, top) for _ in range(runs)]
+        seconds = statistics.median(sample["seconds"] for sample in samples)
+        rss_mib = max(sample["rss_bytes"] for sample in samples) / 2**20
+        budget_seconds, budget_mib = BUDGETS.get(module, (float("inf"), float("inf")))
+        report.append({
+            "module": module,
+            "seconds": round(seconds, 3),
+            "rss_mib": round(rss_mib, 1),
+            "budget_seconds": budget_seconds * budget_scale,
+            "budget_mib": budget_mib * budget_scale,
+            "over_budget": seconds > budget_seconds * budget_scale or rss_mib > budget_mib * budget_scale,
+            # Dependency times from the fastest run are the least noisy
+            "dependencies": min(samples, key=lambda sample: sample["seconds"])["dependencies"],
+        })
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time and memory of the app and its pages.")
+    parser.add_argument("modules", nargs="*", help="Modules to measure (default: app.py and every page)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module; the median time is reported")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget, e.g. 2 on slow CI machines")
+    parser.add_argument("--top", type=int, default=5, help="Dependencies to list per module")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.modules, args.runs, args.budget_scale, args.top)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for entry in report:
+        status = "OVER BUDGET" if entry["over_budget"] else "ok"
+        print(f"{entry['module']:<28} {entry['seconds'] * 1000:7.0f} ms {entry['rss_mib']:7.1f} MiB  "
+              f"(budget {entry['budget_seconds'] * 1000:.0f} ms, {entry['budget_mib']:.0f} MiB)  {status}")
+        for name, seconds in entry["dependencies"]:
+            print(f"    {name:<24} {seconds * 1000:7.0f} ms")
+    if any(entry["over_budget"] for entry in report):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
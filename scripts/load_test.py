@@ -0,0 +1,314 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import time
+from datetime import date
+from streamlit.testing.v1 import AppTest
+
+# Simulate concurrent respondents without a browser or a database:
+#   python -m scripts.load_test --users 50 --scenario mixed --db-latency 5
+# Each virtual user drives a full walkthrough through Streamlit's AppTest against
+# an in-memory Neo4j stand-in and a stubbed geocoder, and every interaction is
+# timed. Drag-and-drop sortables are custom components that AppTest cannot
+# interact with, so their scores stay at the defaults.
+
+# The page modules read these when they are first imported
+os.environ.setdefault('NEO4J_URI', 'bolt://localhost:7687')
+os.environ.setdefault('OPEN_CAGE_API_KEY', 'load-test')
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def single(self):
+        return self.records[0] if self.records else None
+
+    def __iter__(self):
+        return iter(self.records)
+
+class FakeTransaction:
+    def __init__(self, store):
+        self.store = store
+
+    def run(self, query, parameters=None, **params):
+        params = {**(parameters or {}), **params}
+        self.store.round_trip()
+        if "CREATE (project:Project" in query:
+            self.store.projects[params["projectID"]] = params
+        elif ":Survey {" in query:
+            self.store.surveys.append(params)
+        elif "count(project)" in query:
+            return FakeResult([{"projects": len(self.store.projects)}])
+        elif "RETURN project.projectID AS projectID" in query:
+            return FakeResult([{"projectID": project_id, "title": project.get("title", "")} for project_id, project in self.store.projects.items()])
+        elif "projectID: $projectID" in query:
+            project = self.store.projects.get(params["projectID"])
+            return FakeResult([{"project": project}] if project else [])
+        return FakeResult([])
+
+class FakeSession:
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_read(self, transaction_function, *args, **kwargs):
+        return transaction_function(FakeTransaction(self.store), *args, **kwargs)
+
+    execute_write = execute_read
+
+    def run(self, query, parameters=None, **params):
+        return FakeTransaction(self.store).run(query, parameters, **params)
+
+class FakeNeo4j:
+    # Stands in for the neo4j driver: projects and surveys are kept in memory
+    # and each query sleeps for the configured round-trip time.
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.projects = {}
+        self.surveys = []
+
+    def round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def session(self, **config):
+        return FakeSession(self)
+
+    def close(self):
+        pass
+
+class FakeGeocoder:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def geocode(self, query, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return [{"geometry": {"lat": 39.1653, "lng": -86.5264}, "formatted": query}]
+
+def survey_app(driver, geocoder):
+    # Runs inside AppTest, which rebuilds this function from its source, so it
+    # must not refer to anything outside its own body
+    import pages.survey_page as page
+    page.driver = driver
+    page.geocoder = geocoder
+    page.initiate_survey()
+
+def create_project_app(driver, geocoder):
+    import pages.create_project_page as page
+    page.driver = driver
+    page.geocoder = geocoder
+    page.app()
+
+class Walkthrough:
+    # One virtual user's AppTest session. Each respondent interaction may take
+    # more than one rerun; `service_times` records the time spent per interaction.
+    def __init__(self, app, driver, geocoder, timeout):
+        self.at = AppTest.from_function(app, default_timeout=timeout, kwargs={"driver": driver, "geocoder": geocoder})
+        self.driver = driver
+        self.service_times = []
+
+    def timed(self, *reruns):
+        start = time.perf_counter()
+        for rerun in reruns:
+            rerun()
+            if self.at.exception:
+                raise RuntimeError(self.at.exception[0].message)
+        self.service_times.append(time.perf_counter() - start)
+
+    def run(self):
+        self.timed(self.at.run)
+
+    def click(self, label):
+        page = self.at.session_state["page"] if "page" in self.at.session_state else None
+        button = next(button for button in self.at.button if button.label == label)
+        button.click()
+
+        def clean_run():
+            if "page" in self.at.session_state and self.at.session_state["page"] != page:
+                # After st.rerun AppTest can keep trailing elements of the previous
+                # page in its tree, so start the new page from a clean run
+                self.at._run()
+        self.timed(self.at.run, clean_run)
+
+# Walkthroughs are generators that yield after every interaction, so the
+# scheduler in run() can interleave many respondents in one process.
+
+def survey_walkthrough(walk, user, project_id):
+    at = walk.at
+    walk.run()
+    yield
+    at.text_input[0].input(project_id)
+    walk.click("Continue")
+    yield
+
+    at.text_input[0].input(f"Load test project {user}")
+    at.selectbox[0].select("Community")
+    for slider in at.slider:
+        slider.set_value(0.8)
+    walk.click("Next")
+    yield
+
+    at.multiselect[0].select("Ripple Effect Scores")
+    walk.click("Next")
+    yield
+    walk.click("Next")
+    yield
+
+    for number_input in at.number_input:
+        number_input.set_value(user % 7 + 1)
+    walk.click("Preview")
+    yield
+    walk.click("Next")
+    yield
+
+    for number_input in at.number_input:
+        number_input.set_value(user % 11 + 2)
+    surveys = len(walk.driver.surveys)
+    walk.click("Submit")
+    # The success message alone would not catch a write the stand-in ignored
+    if not at.success or len(walk.driver.surveys) == surveys:
+        raise RuntimeError("survey was not saved")
+
+def create_project_walkthrough(walk, user, project_id):
+    at = walk.at
+    walk.run()
+    yield
+    at.text_input[0].input(f"Load test project {user}")
+    at.text_input[1].input("Bloomington, Indiana")
+    at.date_input[0].set_value(date(2024, 1, 15))
+    walk.run()
+    yield
+    at.text_input[2].input("Principal Investigator")
+    at.text_input[3].input(f"Respondent {user}")
+    at.text_input[4].input("Indiana University")
+    projects = len(walk.driver.projects)
+    walk.click("Save Project and Initiate Survey")
+    if not at.success or len(walk.driver.projects) == projects:
+        raise RuntimeError("project was not saved")
+
+SCENARIOS = {
+    "survey": [(survey_app, survey_walkthrough)],
+    "create": [(create_project_app, create_project_walkthrough)],
+    "mixed": [(survey_app, survey_walkthrough), (create_project_app, create_project_walkthrough)],
+}
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+def latency_summary(values):
+    values = sorted(values)
+    return {
+        "p50": round(percentile(values, 0.50) * 1000, 1),
+        "p95": round(percentile(values, 0.95) * 1000, 1),
+        "p99": round(percentile(values, 0.99) * 1000, 1),
+        "max": round(values[-1] * 1000, 1) if values else 0.0,
+    }
+
+def max_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def run(users=10, scenario="survey", db_latency=0.0, geocode_latency=0.0, timeout=30):
+    driver = FakeNeo4j(db_latency)
+    geocoder = FakeGeocoder(geocode_latency)
+    # Survey respondents need an existing project to enter
+    project_ids = [f"LOADTEST{user:04d}" for user in range(users)]
+    for project_id in project_ids:
+        driver.projects[project_id] = {"projectID": project_id}
+
+    # Import the pages once up front so module import time is not counted as latency
+    for app in (survey_app, create_project_app):
+        Walkthrough(app, driver, geocoder, timeout).run()
+
+    sessions = []
+    active = {}
+    for user in range(users):
+        app, walkthrough = SCENARIOS[scenario][user % len(SCENARIOS[scenario])]
+        walk = Walkthrough(app, driver, geocoder, timeout)
+        sessions.append((walkthrough.__name__, walk))
+        active[user] = walkthrough(walk, user, project_ids[user])
+
+    # AppTest swaps process-wide runtime state on every run, so sessions cannot
+    # run on parallel threads. Like a single Streamlit server, which serializes
+    # script execution on the GIL, every active respondent acts once per wave and
+    # waits for those ahead of it; the wait is part of its response latency.
+    response_times = []
+    failed = []
+    rss_before = max_rss_bytes()
+    start = time.perf_counter()
+    # The pages print debugging output on submit; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        while active:
+            wave_start = time.perf_counter()
+            for user, steps in list(active.items()):
+                try:
+                    next(steps)
+                except StopIteration:
+                    del active[user]
+                    continue
+                except Exception as e:
+                    del active[user]
+                    failed.append({"walkthrough": sessions[user][0], "error": str(e)})
+                    continue
+                response_times.append(time.perf_counter() - wave_start)
+    elapsed = time.perf_counter() - start
+    # Sessions are still referenced by `sessions`, so the RSS growth covers them all
+    rss_growth = max(0, max_rss_bytes() - rss_before)
+
+    service_times = [duration for _, walk in sessions for duration in walk.service_times]
+    completed = users - len(failed)
+    return {
+        "scenario": scenario,
+        "users": users,
+        "completed": completed,
+        "failed": failed,
+        "interactions": len(service_times),
+        "elapsed_seconds": round(elapsed, 3),
+        "interactions_per_second": round(len(service_times) / elapsed, 1) if elapsed else 0.0,
+        "walkthroughs_per_second": round(completed / elapsed, 2) if elapsed else 0.0,
+        "rerun_latency_ms": latency_summary(service_times),
+        "response_latency_ms": latency_summary(response_times),
+        "memory_per_session_kb": round(rss_growth / users / 1024, 1),
+        "saved": {"projects": len(driver.projects) - users, "surveys": len(driver.surveys)},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent survey respondents against stand-in services.")
+    parser.add_argument("--users", type=int, default=10, help="Virtual users active at the same time")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="survey")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Milliseconds added to every Neo4j query")
+    parser.add_argument("--geocode-latency", type=float, default=0.0, help="Milliseconds added to every geocoder call")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds a single rerun may take")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.users, args.scenario, args.db_latency / 1000, args.geocode_latency / 1000, args.timeout)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{report['completed']}/{report['users']} {report['scenario']} walkthroughs in {report['elapsed_seconds']}s "
+          f"({report['walkthroughs_per_second']}/s, {report['interactions_per_second']} interactions/s)")
+    for name, key in (("rerun", "rerun_latency_ms"), ("response", "response_latency_ms")):
+        latency = report[key]
+        print(f"{name} latency: p50 {latency['p50']}ms, p95 {latency['p95']}ms, p99 {latency['p99']}ms, max {latency['max']}ms")
+    print(f"memory per session: {report['memory_per_session_kb']} KiB")
+    for failure in report["failed"]:
+        print(f"failed {failure['walkthrough']}: {failure['error']}")
+
+if __name__ == "__main__":
+    main()
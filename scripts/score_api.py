@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import tornado.httpserver
+import tornado.web
+from utils.calculations import score_response, score_responses
+
+# Standalone JSON API for partner systems that need survey scores without
+# driving the Streamlit UI:
+#   python -m scripts.score_api --port 8600
+#   POST /score         one response   -> {"scores": {...}}
+#   POST /score/batch   {"responses": [...]} -> {"results": [{"scores": ...} | {"error": ...}]}
+# A response is {"sortables": {dimension: [items]}, "first_degree": {...}, ...}
+# as described in utils.calculations.score_response. Nothing is stored.
+
+SCORE_API_PORT = int(os.getenv('SCORE_API_PORT', '8600'))
+SCORE_WORKERS = int(os.getenv('SCORE_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+# Responses per worker task; smaller batches are scored on the event loop,
+# where they take less time than the round trip to a worker would
+SCORE_CHUNK = int(os.getenv('SCORE_CHUNK', '500'))
+SCORE_BATCH_LIMIT = int(os.getenv('SCORE_BATCH_LIMIT', '50000'))
+# Idle keep-alive connections are closed after this many seconds
+IDLE_CONNECTION_TIMEOUT = 60
+
+class JSONHandler(tornado.web.RequestHandler):
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json")
+
+    def read_json(self):
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Body is not valid JSON")
+
+    def write_error(self, status_code, **kwargs):
+        self.finish(json.dumps({"error": self._reason}))
+
+class ScoreHandler(JSONHandler):
+    def post(self):
+        try:
+            scores = score_response(self.read_json())
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=str(e))
+        self.finish(json.dumps({"scores": scores}))
+
+class BatchScoreHandler(JSONHandler):
+    def initialize(self, executor):
+        self.executor = executor
+
+    async def post(self):
+        body = self.read_json()
+        responses = body.get("responses") if isinstance(body, dict) else None
+        if not isinstance(responses, list):
+            raise tornado.web.HTTPError(400, reason="Expected {\"responses\": [...]}")
+        if len(responses) > SCORE_BATCH_LIMIT:
+            raise tornado.web.HTTPError(413, reason=f"At most {SCORE_BATCH_LIMIT} responses per batch")
+
+        if len(responses) <= SCORE_CHUNK:
+            results = score_responses(responses)
+        else:
+            # Chunks are scored in parallel and gathered in order, while the
+            # event loop keeps serving other connections
+            loop = asyncio.get_running_loop()
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(self.executor, score_responses, responses[start:start + SCORE_CHUNK])
+                for start in range(0, len(responses), SCORE_CHUNK)
+            ))
+            results = [result for chunk in chunks for result in chunk]
+        self.finish(json.dumps({"results": results}))
+
+def make_app(executor):
+    return tornado.web.Application([
+        (r"/score", ScoreHandler),
+        (r"/score/batch", BatchScoreHandler, {"executor": executor}),
+    ])
+
+async def serve(port, address, workers):
+    # Spawn rather than fork so workers don't inherit the server's sockets
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        # HTTP/1.1 connections are kept alive between requests by default
+        server = tornado.httpserver.HTTPServer(
+            make_app(executor),
+            idle_connection_timeout=IDLE_CONNECTION_TIMEOUT,
+            max_body_size=256 * 2**20,
+        )
+        server.listen(port, address)
+        print(f"Scoring API on http://{address}:{port} with {workers} workers")
+        await asyncio.Event().wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve survey scoring over HTTP.")
+    parser.add_argument("--port", type=int, default=SCORE_API_PORT)
+    parser.add_argument("--address", default="127.0.0.1", help="Interface to listen on (default: local only)")
+    parser.add_argument("--workers", type=int, default=SCORE_WORKERS, help="Processes for large batches")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.address, args.workers))
+
+if __name__ == "__main__":
+    main()
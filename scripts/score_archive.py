@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from utils.calculations import CATEGORY_DIMENSIONS, DEGREE_FIELDS, DIMENSIONS, score_response
+
+# Score an archive of raw survey responses for research exports, without Neo4j:
+#   python -m scripts.score_archive responses.jsonl scores.parquet --workers 8
+# Each input line is one response as accepted by the scoring API (see
+# utils.calculations.score_response); `response_id` and `projectID` are copied
+# through when present. Output rows are written in input order, one per line,
+# and only a bounded number of chunks is in flight, so memory stays flat
+# however large the archive is.
+
+SCORE_FIELDS = [f"{dimension}_score" for dimension in DIMENSIONS] + list(CATEGORY_DIMENSIONS)
+RIPPLE_FIELDS = [f"{degree}_{part}" for degree in DEGREE_FIELDS for part in ("people", "ripple_score", "ripple_share")]
+OUTPUT_FIELDS = ["line", "response_id", "projectID", "error"] + SCORE_FIELDS + RIPPLE_FIELDS
+# Ripple scores and shares are whole numbers, stored as int64 in Parquet
+INTEGER_FIELDS = [field for field in RIPPLE_FIELDS if not field.endswith("_people")]
+INT64_MAX = 2**63 - 1
+
+def error_row(line_number, error):
+    row = dict.fromkeys(OUTPUT_FIELDS)
+    row["line"] = line_number
+    row["error"] = error
+    return row
+
+def flat_scores(line_number, text):
+    try:
+        response = json.loads(text)
+        scores = score_response(response)
+    except (ValueError, OverflowError) as e:
+        # One bad line is reported in its row rather than stopping the run
+        return error_row(line_number, str(e))
+    row = dict.fromkeys(OUTPUT_FIELDS)
+    row["line"] = line_number
+    row["response_id"] = response.get("response_id")
+    row["projectID"] = response.get("projectID")
+    for field in SCORE_FIELDS:
+        row[field] = scores[field]
+    for degree, ripple in zip(DEGREE_FIELDS, scores.get("ripple", [])):
+        row[f"{degree}_people"] = ripple["values"]
+        row[f"{degree}_ripple_score"] = ripple["ripple_score"]
+        row[f"{degree}_ripple_share"] = ripple["adj_score"]
+    # Checked here, in the worker, so the Parquet writer never sees a row it cannot store
+    if any(row[field] is not None and abs(row[field]) > INT64_MAX for field in INTEGER_FIELDS):
+        return error_row(line_number, "ripple scores are too large to store")
+    return row
+
+def score_lines(first_line, lines):
+    # Runs in a worker process; parsing happens there too
+    return [flat_scores(line_number, text) for line_number, text in enumerate(lines, start=first_line) if text.strip()]
+
+def read_chunks(f, chunk_size):
+    chunk, first_line = [], 1
+    for line_number, text in enumerate(f, start=1):
+        if not chunk:
+            first_line = line_number
+        chunk.append(text)
+        if len(chunk) == chunk_size:
+            yield first_line, chunk
+            chunk = []
+    if chunk:
+        yield first_line, chunk
+
+def _finish(tmp_path, path, complete):
+    # Output only appears under its real name once every row is written
+    if complete:
+        os.replace(tmp_path, path)
+    elif os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+class JSONLWriter:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.f = sys.stdout if path == "-" else open(self.tmp_path, "w")
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write(json.dumps(row) + "\n")
+
+    def close(self, complete=True):
+        if self.f is not sys.stdout:
+            self.f.close()
+            _finish(self.tmp_path, self.path, complete)
+
+class ParquetWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        # Degree counts may be fractional, so people are floats like the scores
+        self.schema = pa.schema(
+            [("line", pa.int64()), ("response_id", pa.string()), ("projectID", pa.string()), ("error", pa.string())]
+            + [(field, pa.float64()) for field in SCORE_FIELDS]
+            + [(field, pa.float64() if field.endswith("_people") else pa.int64()) for field in RIPPLE_FIELDS]
+        )
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+
+    def write(self, rows):
+        # One row group per chunk
+        self.writer.write_batch(self.pa.RecordBatch.from_pylist(rows, schema=self.schema))
+
+    def close(self, complete=True):
+        self.writer.close()
+        _finish(self.tmp_path, self.path, complete)
+
+def run(input_path, output_path, fmt="jsonl", workers=None, chunk_size=1000):
+    workers = workers or os.cpu_count() or 1
+    source = sys.stdin if input_path == "-" else open(input_path)
+    writer = ParquetWriter(output_path) if fmt == "parquet" else JSONLWriter(output_path)
+    pending = deque()
+    totals = {"responses": 0, "errors": 0}
+
+    def collect(limit):
+        # Write finished chunks in input order, keeping at most `limit` in flight
+        while len(pending) > limit:
+            rows = pending.popleft().result()
+            totals["responses"] += len(rows)
+            totals["errors"] += sum(row["error"] is not None for row in rows)
+            writer.write(rows)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for first_line, lines in read_chunks(source, chunk_size):
+                pending.append(executor.submit(score_lines, first_line, lines))
+                collect(workers * 2)
+            collect(0)
+    except BaseException:
+        writer.close(complete=False)
+        raise
+    else:
+        writer.close()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a JSONL archive of raw survey responses.")
+    parser.add_argument("input", help="JSONL responses, one per line ('-' for stdin)")
+    parser.add_argument("output", help="Output path ('-' for stdout, JSONL only)")
+    parser.add_argument("--format", dest="fmt", choices=["jsonl", "parquet"], default=None,
+                        help="Output format (default: from the output file extension)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Responses per worker task")
+    args = parser.parse_args()
+
+    fmt = args.fmt or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    if fmt == "parquet" and args.output == "-":
+        parser.error("Parquet output needs a file path")
+    totals = run(args.input, args.output, fmt, args.workers, args.chunk_size)
+    print(f"{totals['responses']} responses scored, {totals['errors']} with errors", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import json
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.survey_response import ALIGNMENT_FIELDS, CATEGORY_FIELDS, DEGREE_FIELDS, DIMENSION_FIELDS
+
+# Neo4j results to Arrow without holding the whole result as Python objects:
+# records are turned into columns a batch at a time, so memory is bounded by
+# the batch size, and batches can be written to Parquet as they are made.
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Typed columns for the properties written by create_project_in_db and
+# create_survey_in_db. JSON-encoded properties stay strings.
+PROJECT_SCHEMA = pa.schema(
+    [
+        ("projectID", pa.string()),
+        ("title", pa.string()),
+        ("project_name", pa.string()),
+        ("location", pa.string()),
+        ("startDate", pa.date32()),
+        ("endDate", pa.date32()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("engagementHours", pa.float64()),
+        ("leadership", pa.string()),
+        ("partners", pa.string()),
+        ("score_visualizations", pa.string()),
+        ("direct_indicator_preferences", pa.string()),
+    ]
+    + [(name, pa.float64()) for name in DIMENSION_FIELDS + CATEGORY_FIELDS]
+)
+
+SURVEY_SCHEMA = pa.schema(
+    [
+        ("response_id", pa.string()),
+        ("projectID", pa.string()),
+        ("connection", pa.string()),
+    ]
+    + [(name, pa.float64()) for name in ALIGNMENT_FIELDS + CATEGORY_FIELDS]
+    + [(name, pa.string()) for name in DEGREE_FIELDS]
+)
+
+def return_properties(variable, schema):
+    # "project.projectID AS projectID, ..." for a RETURN clause matching `schema`
+    return ", ".join(f"{variable}.{field.name} AS {field.name}" for field in schema)
+
+def _native(value):
+    # Neo4j temporal values convert to their datetime equivalents
+    return value.to_native() if hasattr(value, "to_native") else value
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+def _converter(arrow_type):
+    if pa.types.is_string(arrow_type):
+        return _to_string
+    if pa.types.is_temporal(arrow_type):
+        return _native
+    return None
+
+def _batch(columns, converters, schema):
+    arrays = []
+    for values, convert, field in zip(columns, converters, schema):
+        if convert is not None:
+            values = [convert(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _columns(records, names):
+    # neo4j Records are tuples; when the RETURN clause matches the schema, a
+    # whole batch is transposed in one step instead of one lookup per value
+    if isinstance(records[0], tuple) and list(records[0].keys()) == names:
+        # Record overrides __iter__ in Python; the plain tuple iterator is C
+        return [list(column) for column in zip(*map(tuple.__iter__, records))]
+    return [[record.get(name) for record in records] for name in names]
+
+def record_batches(records, schema, batch_size=DEFAULT_BATCH_SIZE):
+    # `records` is any iterable of neo4j Records or dicts keyed by field name;
+    # missing keys become nulls
+    names = schema.names
+    converters = [_converter(field.type) for field in schema]
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield _batch(_columns(batch, names), converters, schema)
+            batch = []
+    if batch:
+        yield _batch(_columns(batch, names), converters, schema)
+
+def write_parquet(path, schema, batches):
+    # Writes each batch as it arrives; the file only appears once complete
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return rows
+
+def query_to_table(tx, query, schema, parameters=None, batch_size=DEFAULT_BATCH_SIZE):
+    # Transaction function: the result goes straight into typed Arrow columns,
+    # with no per-record dicts in between
+    result = tx.run(query, parameters or {})
+    return pa.Table.from_batches(list(record_batches(result, schema, batch_size)), schema=schema)
+
+def query_to_dataframe(tx, query, schema, parameters=None, batch_size=DEFAULT_BATCH_SIZE):
+    # ArrowDtype columns wrap the Arrow buffers instead of copying them into
+    # NumPy arrays, and keep nulls as <NA> rather than NaN/None
+    import pandas as pd
+    return query_to_table(tx, query, schema, parameters, batch_size).to_pandas(types_mapper=pd.ArrowDtype)
@@ -0,0 +1,183 @@
+import io
+from datetime import date
+from matplotlib.figure import Figure
+from matplotlib.offsetbox import AnchoredOffsetbox, HPacker, TextArea
+from matplotlib.patches import Circle, Rectangle
+from utils.badge_cache import badge_cache_key, read_cached_badge, write_cached_badge
+from utils.badge_style import (
+    BORDER_COLOR, CREDIT_TEXT, GRID_COLOR, IU_PALETTE, LABEL_COLORS, LABEL_IMPACTS,
+    RAW_IMPACTS, SPIRAL_PALETTE, TEXT_COLOR, rescale,
+)
+from utils.calculations import calculate_ripple, prep_composite
+from utils.render_pool import render
+from utils.spirals import prep_arch, prepare_vogel
+from utils.svg_badge import render_svg_badge
+
+# Python port of the badge functions in visualization_functions.R.
+# Figures are built with matplotlib.figure.Figure rather than pyplot so nothing
+# is registered with the global figure manager and every figure can be freed.
+
+def _blank_axis(ax):
+    ax.set_axis_off()
+    ax.patch.set_alpha(0)
+
+def bake_donut(ax, category_scores, overall):
+    scores = [score["category_index"] for score in category_scores]
+    # Empty wedges would stack their labels on top of each other
+    labels = [f"{score['category_name']}\n{score['category_index']}" if score["category_index"] else "" for score in category_scores]
+    if not any(scores):
+        # A pie of zeros cannot be drawn; show equal empty wedges instead
+        scores = [1] * len(scores)
+    ax.pie(
+        scores,
+        labels=labels,
+        colors=IU_PALETTE,
+        startangle=90,
+        counterclock=False,
+        wedgeprops={"width": 0.5, "edgecolor": BORDER_COLOR, "linewidth": 1},
+        textprops={"color": TEXT_COLOR},
+    )
+    ax.text(0, 0, str(overall), ha="center", va="center", fontsize=48, color=TEXT_COLOR)
+    ax.set_aspect("equal")
+
+def prep_raw(ax, category_scores):
+    values = rescale([score["category_impact_number"] for score in category_scores], 3, 100)
+    left = 0
+    for value, color in zip(values, IU_PALETTE):
+        ax.barh(0, value, left=left, height=1, color=color, edgecolor=BORDER_COLOR)
+        left += value
+    ax.set_xlim(0, left)
+    ax.set_ylim(-0.5, 0.5)
+    _blank_axis(ax)
+
+def prep_labels(ax, category_scores, fontsize=10):
+    # Matplotlib has no rich text, so the R HTML label is packed from styled pieces
+    pieces = []
+    for score, color, impact in zip(category_scores, LABEL_COLORS, LABEL_IMPACTS):
+        pieces.append(TextArea("█", textprops={"color": color, "alpha": 0.53, "fontsize": fontsize}))
+        pieces.append(TextArea(str(score["category_impact_number"]), textprops={"color": color, "weight": "bold", "fontsize": fontsize}))
+        pieces.append(TextArea(impact, textprops={"color": TEXT_COLOR, "fontsize": fontsize}))
+    packed = HPacker(children=pieces, align="center", pad=0, sep=4)
+    ax.add_artist(AnchoredOffsetbox(loc="center", child=packed, frameon=False))
+    _blank_axis(ax)
+
+def credit_line(ax, generated=None):
+    text = CREDIT_TEXT.format(date=generated or date.today().isoformat())
+    ax.text(0.5, 0.5, text, ha="center", va="center", fontsize=7, color=TEXT_COLOR)
+    _blank_axis(ax)
+
+def create_title_line(ax, title_description, title_score):
+    # Drawn as a patch because transparent saves clear the axes background
+    ax.add_patch(Rectangle((0, 0), 1, 1, transform=ax.transAxes, color="#990000aa"))
+    ax.text(0.5, 0.5, f"{title_description} $\\bf{{{title_score}}}$", ha="center", va="center", fontsize=24, color=BORDER_COLOR)
+    _blank_axis(ax)
+
+def plot_indicators(ax, category_scores):
+    numbers = [score["category_impact_number"] for score in category_scores]
+    if 0 in numbers or not sum(numbers):
+        min_scale = 0.01
+    else:
+        min_scale = (min(numbers) / sum(numbers)) * 60 + 5
+    sizes = rescale(numbers, min_scale, 60)
+
+    ax.plot([0, 6], [1, 1], color=GRID_COLOR, linewidth=0.5, zorder=0)
+    for x in range(1, 6):
+        ax.plot([x, x], [-0.75, 2.75], color=GRID_COLOR, linewidth=0.5, zorder=0)
+    positions = list(range(1, len(category_scores) + 1))
+    # ggplot point sizes are diameters in mm; scatter wants areas in points^2
+    ax.scatter(positions, [1] * len(positions), s=(60 * 2.85) ** 2, facecolors="none", edgecolors=GRID_COLOR, linewidths=0.5, zorder=1)
+    for x, size, color, score, impact in zip(positions, sizes, IU_PALETTE, category_scores, RAW_IMPACTS):
+        ax.scatter([x], [1], s=(size * 2.85) ** 2, color=color, label=f"{score['category_impact_number']} {impact}", zorder=2)
+    ax.set_xlim(0, 6)
+    ax.set_ylim(-0.75, 2.75)
+    ax.legend(loc="upper center", bbox_to_anchor=(0.5, 0), ncol=len(category_scores), frameon=False, markerscale=0.1)
+    _blank_axis(ax)
+
+def _draw_guides(ax, extent, diagonal, radii):
+    # The axis cross, diagonals and rings drawn behind both spiral plots
+    ax.plot([-extent, extent], [0, 0], color=GRID_COLOR, linewidth=0.3, zorder=0)
+    ax.plot([0, 0], [-extent, extent], color=GRID_COLOR, linewidth=0.3, zorder=0)
+    for dx, dy in [(1, -1), (1, 1), (-1, -1), (-1, 1)]:
+        ax.plot([0, dx * diagonal], [0, dy * diagonal], color=GRID_COLOR, linewidth=0.3, zorder=0)
+    ax.add_patch(Circle((0, 0), radii[0], edgecolor=GRID_COLOR, facecolor="#ffffff", zorder=0))
+    for radius in radii[1:]:
+        ax.add_patch(Circle((0, 0), radius, edgecolor=GRID_COLOR, facecolor="none", zorder=0))
+    ax.set_xlim(-extent, extent)
+    ax.set_ylim(-extent, extent)
+    ax.set_aspect("equal")
+    _blank_axis(ax)
+
+def _draw_runs(ax, frame, colors, labels, size):
+    for group, start, stop in frame["runs"]:
+        ax.scatter(frame["x"][start:stop], frame["y"][start:stop], s=(size * 2.85) ** 2, color=colors[group], label=labels[group], zorder=2)
+    ax.legend(loc="upper center", bbox_to_anchor=(0.5, 0), ncol=len(frame["runs"]), frameon=False, markerscale=0.3)
+
+def plot_vogel(ax, ripple):
+    frame = prepare_vogel(ripple)
+    _draw_guides(ax, 10, 8, [1, 5, 10])
+    ax.scatter([0], [0], color=GRID_COLOR, s=(2 * 2.85) ** 2, zorder=1)
+    labels = {row["group"]: row["group_name"] for row in ripple}
+    _draw_runs(ax, frame, SPIRAL_PALETTE, labels, 6)
+
+def plot_arch(ax, composite):
+    frame = prep_arch(composite)
+    _draw_guides(ax, 16, 15, [1, 5, 10, 15])
+    colors = {row["category"]: color for row, color in zip(composite, IU_PALETTE)}
+    labels = {row["category"]: row["category_name"] for row in composite}
+    _draw_runs(ax, frame, colors, labels, 8)
+
+def construct_bottom_badge(fig, spec, badge_data):
+    grid = spec.subgridspec(2, 3, width_ratios=[14.5, 2, 14.5], height_ratios=[2, 14.5])
+    create_title_line(fig.add_subplot(grid[0, 0]), "Composite Impact Score", badge_data["overall"])
+    plot_arch(fig.add_subplot(grid[1, 0]), prep_composite(badge_data["category_scores"]))
+    if badge_data.get("ripple"):
+        ripple = calculate_ripple(badge_data["ripple"])
+        create_title_line(fig.add_subplot(grid[0, 2]), "Ripple Effect Score", sum(row["ripple_score"] for row in ripple))
+        plot_vogel(fig.add_subplot(grid[1, 2]), ripple)
+
+def _save(fig, fmt, dpi):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, transparent=True)
+    return buffer.getvalue()
+
+def compile_badge(badge_data, fmt="png", dpi=320):
+    category_scores = badge_data["category_scores"]
+    fig = Figure(figsize=(8, 8))
+    grid = fig.add_gridspec(4, 1, height_ratios=[8, 1, 1, 1])
+    bake_donut(fig.add_subplot(grid[0]), category_scores, badge_data["overall"])
+    prep_raw(fig.add_subplot(grid[1]), category_scores)
+    prep_labels(fig.add_subplot(grid[2]), category_scores)
+    credit_line(fig.add_subplot(grid[3]))
+    return _save(fig, fmt, dpi)
+
+def construct_badge(badge_data, fmt="png", dpi=320):
+    category_scores = badge_data["category_scores"]
+    fig = Figure(figsize=(16, 10))
+    grid = fig.add_gridspec(4, 1, height_ratios=[1.5, 8, 16, 1])
+    create_title_line(fig.add_subplot(grid[0]), "Direct Indicator Score", badge_data.get("indicator_score", badge_data["overall"]))
+    plot_indicators(fig.add_subplot(grid[1]), category_scores)
+    construct_bottom_badge(fig, grid[2], badge_data)
+    credit_line(fig.add_subplot(grid[3]))
+    return _save(fig, fmt, dpi)
+
+LAYOUTS = {
+    "badge": compile_badge,
+    "dashboard": construct_badge,
+}
+
+def render_badge(badge_data, layout="badge", fmt="png", pool=True):
+    # Badges are content-addressed: identical inputs and style are served from disk.
+    # Misses are drawn in the render pool unless the caller is already a worker.
+    if layout == "badge" and fmt == "svg":
+        # Written from string templates without the pool. Callers that must not
+        # load matplotlib use utils.svg_badge directly.
+        return render_svg_badge(badge_data)
+    key = badge_cache_key(badge_data, layout)
+    content = read_cached_badge(key, fmt)
+    if content is None:
+        if pool:
+            content = render(LAYOUTS[layout], badge_data, fmt=fmt)
+        else:
+            content = LAYOUTS[layout](badge_data, fmt=fmt)
+        write_cached_badge(key, fmt, content)
+    return content
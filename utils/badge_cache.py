@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+import tempfile
+from utils.metrics import count_cache_miss, count_cache_request
+
+# Bump whenever the badge layout, palette or fonts change so old renders are not reused
+BADGE_STYLE_VERSION = "1"
+
+BADGE_CACHE_DIR = os.getenv('BADGE_CACHE_DIR', os.path.join("outputs", "badges"))
+
+def badge_cache_key(badge_data, layout="badge", style_version=BADGE_STYLE_VERSION):
+    payload = json.dumps(
+        {"layout": layout, "style": style_version, "data": badge_data},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def badge_cache_path(key, fmt, cache_dir=BADGE_CACHE_DIR):
+    # Fan out by the first two hex digits to keep directories small
+    return os.path.join(cache_dir, key[:2], f"{key}.{fmt}")
+
+def read_cached_badge(key, fmt, cache_dir=BADGE_CACHE_DIR):
+    count_cache_request("badges")
+    try:
+        with open(badge_cache_path(key, fmt, cache_dir), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        count_cache_miss("badges")
+        return None
+
+def write_cached_badge(key, fmt, content, cache_dir=BADGE_CACHE_DIR):
+    path = badge_cache_path(key, fmt, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so readers never see a partial badge
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
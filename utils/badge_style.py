@@ -0,0 +1,27 @@
+# Badge palette, wording and scaling shared by the matplotlib renderer
+# (utils/badge.py) and the lightweight SVG renderer (utils/svg_badge.py).
+# Kept free of third-party imports so the SVG path stays small.
+
+IU_PALETTE = ["#990000", "#FFAA00", "#006298", "#7D4C73", "#056E41"]
+
+# prep_labels uses a darker purple than the palette for the fourth category
+LABEL_COLORS = ["#990000", "#FFAA00", "#006298", "#59264D", "#056E41"]
+
+SPIRAL_PALETTE = {1: "#990000", 2: "#F23A3F", 3: "#FFD6DB", 4: "#FFF7F8"}
+
+RAW_IMPACTS = ["Participants", "Hours", "Infrastructures", "Outputs", "Partners"]
+
+LABEL_IMPACTS = ["Participants", "Engagement Hours", "Infrastructure Products", "Outputs", "Partners"]
+
+TEXT_COLOR = "#191919"
+BORDER_COLOR = "#EDEBEB"
+GRID_COLOR = "#eeeeee"
+
+CREDIT_TEXT = "Community Engaged Research Balanced Expressions and Assessments with Nuanced Scores -- Generated {date} -- CC BY-NC-SA 4.0"
+
+def rescale(values, low, high):
+    # Same behaviour as scales::rescale, including the zero-range case
+    smallest, largest = min(values), max(values)
+    if largest == smallest:
+        return [(low + high) / 2 for _ in values]
+    return [low + (value - smallest) / (largest - smallest) * (high - low) for value in values]
@@ -1,3 +1,6 @@
+import json
+import math
+
 def sample_calculation_logic(include_direct, include_impact, include_alignment, include_ripple):
     # Placeholder function to simulate score calculation
     scores = {}
@@ -9,4 +12,190 @@ def sample_calculation_logic(include_direct, include_impact, include_alignment,
         scores['Alignment'] = 85
     if include_ripple:
         scores['Ripple'] = 65
-    return scores
\ No newline at end of file
+    return scores
+
+# Survey category sums stored on each Project, in badge order
+CATEGORY_PROPERTIES = [
+    ("Context", "context_score"),
+    ("Processes", "processes_score"),
+    ("Interventions and Research", "interventions_and_research_score"),
+    ("Engaged Learners", "engaged_learners_score"),
+    ("Outcomes", "outcomes_score"),
+]
+
+# Sortable dimensions summed into each survey category (as on page_3 of the survey).
+# Voice is scored but not part of any category.
+CATEGORY_DIMENSIONS = {
+    "context_score": ["challenge_origin", "diversity", "trust", "resources"],
+    "processes_score": ["beneficence", "reflection", "decision_making", "tool_construction"],
+    "interventions_and_research_score": ["duration", "frequency", "research_questions", "design_facilitation"],
+    "engaged_learners_score": ["reciprocity", "civic_learning", "critical_reflection", "integration"],
+    "outcomes_score": ["goals_met", "outputs_delivered", "capacities_capabilities", "sustainability"],
+}
+
+DIMENSIONS = [dimension for dimensions in CATEGORY_DIMENSIONS.values() for dimension in dimensions] + ["voice"]
+
+# Ripple estimates from page_4 and page_5, from the project outwards
+DEGREE_FIELDS = ("first_degree", "second_degree", "third_degree")
+
+# Weight tags at the end of each sortable item's label, e.g. "Community members led the work (0.95)"
+MULTIPLIERS = [
+    (1, "(1)"),
+    (0.95, "(0.95)"),
+    (0.90, "(0.90)"),
+    (0.84, "(0.84)"),
+    (0.78, "(0.78)")
+]
+
+def calculate_sortable_score(items, multipliers=MULTIPLIERS):
+    # `items` are the labels under "Describes My Project", in the order given
+    score = 0
+    for i, item in enumerate(items):
+        for weight, text in multipliers:
+            if text in item:
+                score += weight * (1 - 0.05 * i)
+    return score / 4.027
+
+def category_scores(dimension_scores):
+    # `dimension_scores` maps "<dimension>_score" to the sortable score
+    return {
+        category: sum(dimension_scores.get(f"{dimension}_score", 0) for dimension in dimensions)
+        for category, dimensions in CATEGORY_DIMENSIONS.items()
+    }
+
+# Direct indicator preference keys, in the order of the badge's raw impact bar
+DIRECT_INDICATORS = [
+    "Individuals Served",
+    "Engagement Hours",
+    "Infrastructure Tools",
+    "Output Products",
+    "Community Partners",
+]
+
+# Each category sums four sortable scores that are at most 1
+CATEGORY_MAXIMUM = 4
+
+def project_badge_data(project):
+    # Build the badge inputs (the R `category_scores` frame) from Project properties
+    indicators = project.get("direct_indicator_preferences") or {}
+    if isinstance(indicators, str):
+        indicators = json.loads(indicators)
+
+    category_scores = []
+    for (category_name, property_name), indicator in zip(CATEGORY_PROPERTIES, DIRECT_INDICATORS):
+        category_index = round(project.get(property_name) or 0, 2)
+        category_scores.append({
+            "category_name": category_name,
+            "category_impact_number": int(indicators.get(indicator, 0) or 0),
+            "category_index": category_index,
+            "category_score": round(category_index / CATEGORY_MAXIMUM * 100),
+        })
+
+    overall = round(sum(score["category_index"] for score in category_scores) / len(category_scores), 2)
+    return {"category_scores": category_scores, "overall": overall}
+
+def calculate_ripple(ripple, lambda_ripple=1):
+    # Port of calculate_ripple in visualization_functions.R. `ripple` is a list of
+    # {"group_name", "values"} rows ordered from the project outwards (group 0 first).
+    rows = []
+    for group, row in enumerate(ripple):
+        if group == 0:
+            # log(1) is zero, so the innermost group keeps its raw value
+            ripple_score = row["values"]
+        else:
+            ripple_score = lambda_ripple * (row["values"] / math.log(group + 1))
+        rows.append({
+            "group": group + 1,
+            "values": row["values"],
+            "ripple_score": round(ripple_score),
+        })
+
+    total = sum(row["ripple_score"] for row in rows)
+    for row, source in zip(rows, ripple):
+        row["adj_score"] = round(row["ripple_score"] / total * 100) if total else 0
+        row["group_name"] = f"{row['values']} {source['group_name']}\n(η = {row['ripple_score']})"
+    return rows
+
+def degree_ripple(first_degree, second_degree, third_degree):
+    # Ripple rows for calculate_ripple from the survey's degree estimates: the
+    # people counted at each degree, ignoring the connection likelihood sliders.
+    ripple = []
+    for group_name, degree in (("First Degree", first_degree), ("Second Degree", second_degree), ("Third Degree", third_degree)):
+        ripple.append({
+            "group_name": group_name,
+            "values": sum(value for key, value in degree.items() if not key.endswith("_likelihood")),
+        })
+    return ripple
+
+def prep_composite(category_scores):
+    # Port of prep_composite in visualization_functions.R
+    composite = []
+    for category, score in enumerate(category_scores, start=1):
+        composite.append({
+            "category": category,
+            "category_name": f"{score['category_name']}\n(i = {score['category_index']}, s = {score['category_score']})",
+            "category_score": score["category_score"] + 1,
+        })
+    total = sum(row["category_score"] for row in composite)
+    for row in composite:
+        row["adj_score"] = round(row["category_score"] / total * 100)
+    return composite
+
+def _finite(value):
+    # float() raises OverflowError for integers beyond the float range, where
+    # math.isfinite would too
+    try:
+        return math.isfinite(float(value))
+    except OverflowError:
+        return False
+
+def score_response(response):
+    # Scores one raw survey response without Streamlit or Neo4j, for the scoring
+    # API and offline scorer. `response["sortables"]` maps each dimension to its
+    # ordered "Describes My Project" labels; the optional degree dicts hold the
+    # page_4/page_5 counts and likelihoods. Raises ValueError on malformed input.
+    if not isinstance(response, dict):
+        raise ValueError("a response must be a JSON object")
+    sortables = response.get("sortables") or {}
+    if not isinstance(sortables, dict):
+        raise ValueError("sortables must map dimensions to lists of items")
+    unknown = sorted(set(sortables) - set(DIMENSIONS))
+    if unknown:
+        raise ValueError(f"unknown dimensions: {', '.join(unknown)}")
+    dimension_scores = {}
+    for dimension in DIMENSIONS:
+        items = sortables.get(dimension) or []
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError(f"{dimension} must be a list of item labels")
+        dimension_scores[f"{dimension}_score"] = calculate_sortable_score(items)
+
+    scores = {**dimension_scores, **category_scores(dimension_scores)}
+    degrees = [response.get(field) or {} for field in DEGREE_FIELDS]
+    for field, degree in zip(DEGREE_FIELDS, degrees):
+        if not isinstance(degree, dict) or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in degree.values()):
+            raise ValueError(f"{field} must map questions to numbers")
+        # json.loads accepts Infinity, NaN and integers of any size, which
+        # calculate_ripple cannot round
+        if not all(_finite(value) for value in degree.values()):
+            raise ValueError(f"{field} must only contain finite numbers")
+        # As on the survey form, counts and likelihoods start at zero
+        if any(value < 0 for value in degree.values()):
+            raise ValueError(f"{field} must not contain negative numbers")
+    if any(degrees):
+        ripple = degree_ripple(*degrees)
+        # Finite counts can still add up to infinity
+        if not all(_finite(row["values"]) for row in ripple):
+            raise ValueError("degree counts are too large")
+        scores["ripple"] = calculate_ripple(ripple)
+    return scores
+
+def score_responses(responses):
+    # Batch form of score_response for worker processes: one result per
+    # response, with malformed ones reported instead of failing the batch
+    results = []
+    for response in responses:
+        try:
+            results.append({"scores": score_response(response)})
+        except ValueError as e:
+            results.append({"error": str(e)})
+    return results
@@ -0,0 +1,71 @@
+import altair as alt
+
+# Dashboard charts as Vega-Lite specs. The browser does the drawing, so the
+# server only aggregates and serializes a bounded number of rows per chart.
+
+# Charts never receive more rows than this; longer series are downsampled
+MAX_POINTS = 500
+
+# Categorical charts keep the largest categories and fold the rest into "Other"
+MAX_CATEGORIES = 12
+
+def limit_categories(rows, max_categories=MAX_CATEGORIES):
+    if len(rows) <= max_categories:
+        return rows
+    rows = sorted(rows, key=lambda row: row[1], reverse=True)
+    kept = rows[:max_categories - 1]
+    return kept + [("Other", sum(value for _, value in rows[max_categories - 1:]))]
+
+def downsample(rows, max_points=MAX_POINTS):
+    # Average consecutive points into max_points buckets, keeping the first x of each bucket
+    if len(rows) <= max_points:
+        return rows
+    bucket_size = len(rows) / max_points
+    sampled = []
+    for bucket in range(max_points):
+        chunk = rows[int(bucket * bucket_size):int((bucket + 1) * bucket_size)]
+        if chunk:
+            sampled.append((chunk[0][0], sum(value for _, value in chunk) / len(chunk)))
+    return sampled
+
+def sector_bar_chart(rows):
+    data = alt.Data(values=[{"sector": sector, "projects": projects} for sector, projects in limit_categories(rows)])
+    return alt.Chart(data, title="Project Sector Involvement").mark_bar().encode(
+        x=alt.X("sector:N", title="Sectors", axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("projects:Q", title="Projects"),
+        color=alt.Color("sector:N", scale=alt.Scale(scheme="viridis"), legend=None),
+        tooltip=["sector:N", "projects:Q"],
+    )
+
+def engagement_pie_chart(rows):
+    data = alt.Data(values=[{"connection": connection, "responses": responses} for connection, responses in limit_categories(rows)])
+    return alt.Chart(data, title="Survey Respondents by Connection").mark_arc().encode(
+        theta=alt.Theta("responses:Q"),
+        color=alt.Color("connection:N", title="Connection"),
+        tooltip=["connection:N", "responses:Q"],
+    )
+
+def engagement_line_graph(rows):
+    data = alt.Data(values=[{"month": month, "hours": hours} for month, hours in downsample(rows)])
+    return alt.Chart(data, title="Engagement Hours Over Time").mark_line(point=True).encode(
+        x=alt.X("month:T", title="Project Start Month"),
+        y=alt.Y("hours:Q", title="Engagement Hours"),
+        tooltip=[alt.Tooltip("month:T", format="%B %Y"), "hours:Q"],
+    )
+
+def category_box_plot(rows):
+    # Rows are (category, minimum, first quartile, median, third quartile, maximum)
+    data = alt.Data(values=[
+        {"category": category, "minimum": low, "q1": q1, "median": median, "q3": q3, "maximum": high}
+        for category, low, q1, median, q3, high in rows
+    ])
+    base = alt.Chart(data, title="Survey Category Scores").encode(x=alt.X("category:N", title="Category", sort=None, axis=alt.Axis(labelAngle=-45)))
+    whiskers = base.mark_rule().encode(y=alt.Y("minimum:Q", title="Score"), y2="maximum:Q")
+    boxes = base.mark_bar(size=30).encode(
+        y="q1:Q",
+        y2="q3:Q",
+        color=alt.Color("category:N", scale=alt.Scale(scheme="viridis"), legend=None),
+        tooltip=["category:N", "minimum:Q", "q1:Q", "median:Q", "q3:Q", "maximum:Q"],
+    )
+    medians = base.mark_tick(color="white", size=30).encode(y="median:Q")
+    return whiskers + boxes + medians
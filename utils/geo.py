@@ -0,0 +1,116 @@
+import math
+import pydeck as pdk
+
+# Project coordinates are stored as a WGS-84 point in `coordinates` (alongside
+# the legacy latitude/longitude floats) so lookups can use the point index.
+POINT_INDEX_NAME = "project_coordinates"
+
+# Number of clustering cells across one map tile; larger values give finer clusters.
+CELLS_PER_TILE = 4
+
+def create_point_index(tx):
+    query = f"""
+    CREATE POINT INDEX {POINT_INDEX_NAME} IF NOT EXISTS
+    FOR (project:Project) ON (project.coordinates)
+    """
+    tx.run(query)
+
+def backfill_project_points(tx):
+    # One-off migration for projects created before `coordinates` existed
+    query = """
+    MATCH (project:Project)
+    WHERE project.coordinates IS NULL
+      AND project.latitude IS NOT NULL
+      AND project.longitude IS NOT NULL
+    SET project.coordinates = point({latitude: project.latitude, longitude: project.longitude})
+    RETURN count(project) AS updated
+    """
+    return tx.run(query).single()["updated"]
+
+def projects_within_radius(tx, latitude, longitude, radius_km, limit=500):
+    query = """
+    WITH point({latitude: $latitude, longitude: $longitude}) AS origin
+    MATCH (project:Project)
+    WHERE point.distance(project.coordinates, origin) <= $radius
+    RETURN project.projectID AS projectID,
+           project.title AS title,
+           project.coordinates.latitude AS latitude,
+           project.coordinates.longitude AS longitude,
+           point.distance(project.coordinates, origin) / 1000.0 AS distance_km
+    ORDER BY distance_km
+    LIMIT $limit
+    """
+    result = tx.run(query, latitude=latitude, longitude=longitude, radius=radius_km * 1000.0, limit=limit)
+    return [record.data() for record in result]
+
+def projects_in_bbox(tx, south, west, north, east, limit=5000):
+    query = """
+    MATCH (project:Project)
+    WHERE point.withinBBox(
+        project.coordinates,
+        point({latitude: $south, longitude: $west}),
+        point({latitude: $north, longitude: $east})
+    )
+    RETURN project.projectID AS projectID,
+           project.title AS title,
+           project.coordinates.latitude AS latitude,
+           project.coordinates.longitude AS longitude
+    LIMIT $limit
+    """
+    result = tx.run(query, south=south, west=west, north=north, east=east, limit=limit)
+    return [record.data() for record in result]
+
+def cluster_cell_size(zoom):
+    # Degrees covered by one clustering cell at a given web-map zoom level
+    zoom = max(0, min(int(zoom), 20))
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+def cluster_projects(tx, zoom, south=-90.0, west=-180.0, north=90.0, east=180.0):
+    # Aggregate projects into grid cells inside Neo4j so only one row per
+    # cluster is returned, however many projects fall inside the viewport.
+    query = """
+    MATCH (project:Project)
+    WHERE point.withinBBox(
+        project.coordinates,
+        point({latitude: $south, longitude: $west}),
+        point({latitude: $north, longitude: $east})
+    )
+    WITH project,
+         toInteger(floor(project.coordinates.latitude / $cell)) AS cell_y,
+         toInteger(floor(project.coordinates.longitude / $cell)) AS cell_x
+    WITH cell_x, cell_y,
+         count(project) AS projects,
+         avg(project.coordinates.latitude) AS latitude,
+         avg(project.coordinates.longitude) AS longitude,
+         collect(project.title)[0..3] AS sample_titles
+    RETURN latitude, longitude, projects, sample_titles
+    """
+    result = tx.run(query, cell=cluster_cell_size(zoom), south=south, west=west, north=north, east=east)
+    return [record.data() for record in result]
+
+def project_cluster_deck(clusters, zoom, latitude=39.17, longitude=-86.52):
+    # `clusters` may come straight from a cache, so the deck fields go on copies
+    data = [
+        {
+            **cluster,
+            "label": ", ".join(title for title in cluster["sample_titles"] if title),
+            # Radius in meters grows with the square root of the cluster size
+            "radius": math.sqrt(cluster["projects"]) * cluster_cell_size(zoom) * 20000,
+        }
+        for cluster in clusters
+    ]
+
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=data,
+        get_position="[longitude, latitude]",
+        get_radius="radius",
+        get_fill_color=[153, 0, 0, 160],
+        pickable=True,
+    )
+    view_state = pdk.ViewState(latitude=latitude, longitude=longitude, zoom=zoom)
+    return pdk.Deck(
+        layers=[layer],
+        initial_view_state=view_state,
+        tooltip={"text": "{projects} project(s)\n{label}"},
+    )
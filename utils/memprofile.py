@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import threading
+import tracemalloc
+from datetime import datetime, timezone
+
+# Opt-in memory profiling for long-running servers. With MEMPROFILE_INTERVAL
+# set, a daemon thread takes a tracemalloc snapshot every interval, compares it
+# with the first one and appends the largest-growing allocation sites, together
+# with the number of Streamlit sessions, to MEMPROFILE_FILE as JSON lines.
+# Summarize a run with:
+#   python -m utils.memprofile outputs/memprofile.jsonl
+# Tracing slows allocation-heavy code noticeably, so leave it off unless a leak
+# is being chased.
+
+MEMPROFILE_INTERVAL = float(os.getenv('MEMPROFILE_INTERVAL', '0'))
+MEMPROFILE_FILE = os.getenv('MEMPROFILE_FILE', os.path.join("outputs", "memprofile.jsonl"))
+# Stack depth kept per allocation; one frame is enough to group by line
+MEMPROFILE_FRAMES = int(os.getenv('MEMPROFILE_FRAMES', '1'))
+MEMPROFILE_TOP = int(os.getenv('MEMPROFILE_TOP', '25'))
+
+# Allocations made by the profiler and the import machinery are not leaks
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+def session_count():
+    # Sessions known to the Streamlit server, or None outside `streamlit run`
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return None
+        return runtime.get_instance()._session_mgr.num_sessions()
+    except Exception:
+        return None
+
+def _filtered(snapshot):
+    return snapshot.filter_traces([tracemalloc.Filter(False, filename) for filename in IGNORED_FILES])
+
+def growth_sites(snapshot, baseline, top=MEMPROFILE_TOP):
+    # compare_to orders by absolute change, so shrinking sites are dropped and
+    # the rest ranked by growth before taking the top ones
+    growing = [stat for stat in _filtered(snapshot).compare_to(_filtered(baseline), "lineno") if stat.size_diff > 0]
+    growing.sort(key=lambda stat: stat.size_diff, reverse=True)
+    sites = []
+    for stat in growing[:top]:
+        frame = stat.traceback[0]
+        sites.append({
+            "site": f"{frame.filename}:{frame.lineno}",
+            "size": stat.size,
+            "growth": stat.size_diff,
+            "count": stat.count,
+            "count_growth": stat.count_diff,
+        })
+    return sites
+
+class MemoryProfiler:
+    def __init__(self, interval, path=MEMPROFILE_FILE, frames=MEMPROFILE_FRAMES, top=MEMPROFILE_TOP):
+        self.interval = interval
+        self.path = path
+        self.frames = frames
+        self.top = top
+        self.baseline = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name="memory-profiler", daemon=True)
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline = tracemalloc.take_snapshot()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def sample(self):
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        sessions = session_count()
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "sessions": sessions,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "bytes_per_session": round(current / sessions) if sessions else None,
+            "top_growth": growth_sites(snapshot, self.baseline, self.top),
+        }
+        # Appending whole lines keeps the file readable even if the server is killed
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def _loop(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                # Profiling must never take the server down
+                pass
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def start_memory_profiler(interval=MEMPROFILE_INTERVAL, path=MEMPROFILE_FILE):
+    # Streamlit reruns app.py on every interaction, so only the first call starts it
+    global _profiler
+    if interval <= 0:
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = MemoryProfiler(interval, path)
+            _profiler.start()
+    return _profiler
+
+def load_samples(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def bytes_per_session(samples):
+    # Least-squares slope of traced memory against session count. Memory that
+    # keeps growing while the session count stays flat points at a leak that
+    # sessions closing will not release.
+    points = [(sample["sessions"], sample["traced_bytes"]) for sample in samples if sample["sessions"] is not None]
+    if len(points) < 2:
+        return None
+    mean_sessions = sum(sessions for sessions, _ in points) / len(points)
+    mean_bytes = sum(traced for _, traced in points) / len(points)
+    variance = sum((sessions - mean_sessions) ** 2 for sessions, _ in points)
+    if not variance:
+        return None
+    return round(sum((sessions - mean_sessions) * (traced - mean_bytes) for sessions, traced in points) / variance)
+
+def summarize(samples, top=10):
+    first, last = samples[0], samples[-1]
+    return {
+        "samples": len(samples),
+        "from": first["time"],
+        "to": last["time"],
+        "traced_growth": last["traced_bytes"] - first["traced_bytes"],
+        "sessions": [first["sessions"], last["sessions"]],
+        "bytes_per_session": bytes_per_session(samples),
+        # Growth is measured from the snapshot taken when profiling started
+        "sites": last["top_growth"][:top],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a memory profile written with MEMPROFILE_INTERVAL set.")
+    parser.add_argument("path", nargs="?", default=MEMPROFILE_FILE)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    samples = load_samples(args.path)
+    if not samples:
+        print(f"No samples in {args.path}")
+        return
+    summary = summarize(samples, args.top)
+    print(f"{summary['samples']} samples from {summary['from']} to {summary['to']}")
+    print(f"traced memory grew {summary['traced_growth'] / 1024:.1f} KiB; sessions {summary['sessions'][0]} -> {summary['sessions'][1]}")
+    if summary["bytes_per_session"] is not None:
+        print(f"{summary['bytes_per_session'] / 1024:.1f} KiB traced per additional session")
+    print("Largest growth since profiling started:")
+    for site in summary["sites"]:
+        print(f"{site['growth'] / 1024:10.1f} KiB  {site['site']} (now {site['size'] / 1024:.1f} KiB in {site['count']} blocks)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import contextvars
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# In-process counters for the Streamlit hot path, exported in the Prometheus
+# text format. Recording is a lock and a few additions, so it stays on in
+# production; exporting only happens when METRICS_PORT or METRICS_FILE is set.
+
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_FILE = os.getenv('METRICS_FILE')
+# Seconds between rewrites of METRICS_FILE
+METRICS_FILE_INTERVAL = float(os.getenv('METRICS_FILE_INTERVAL', '15'))
+
+# Upper bounds in seconds for the latency histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "centr_page_rerun_seconds": ("histogram", "Time spent running a page function once."),
+    "centr_neo4j_queries_total": ("counter", "Neo4j transaction functions and queries run."),
+    "centr_neo4j_seconds": ("histogram", "Time spent in Neo4j transaction functions and queries."),
+    "centr_neo4j_errors_total": ("counter", "Neo4j calls that raised."),
+    "centr_geocoder_requests_total": ("counter", "Geocoder lookups sent to OpenCage."),
+    "centr_geocoder_seconds": ("histogram", "Time spent waiting for the geocoder."),
+    "centr_geocoder_errors_total": ("counter", "Geocoder lookups that raised."),
+    "centr_cache_requests_total": ("counter", "Cache lookups."),
+    "centr_cache_misses_total": ("counter", "Cache lookups that had to compute the value."),
+    "centr_project_id_filter_total": ("counter", "projectID prompt lookups by Bloom filter outcome."),
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+# (name, labels) -> [per-bucket counts..., +Inf count, sum]
+_histograms = {}
+
+# The page whose function is running, so Neo4j and geocoder calls made inside
+# it are attributed to that page
+current_page = contextvars.ContextVar("current_page", default="none")
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def increment(name, value=1, **labels):
+    with _lock:
+        _counters[(name, _labels(labels))] += value
+
+def observe(name, seconds, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+        series[len(LATENCY_BUCKETS)] += 1
+        series[-1] += seconds
+
+# For st.cache_data functions, count the request in the caller and the miss
+# inside the cached function, whose body only runs when nothing is cached
+def count_cache_request(cache):
+    increment("centr_cache_requests_total", cache=cache)
+
+def count_cache_miss(cache):
+    increment("centr_cache_misses_total", cache=cache)
+
+def instrument_page(name):
+    # Wraps a page function; st.rerun and st.stop raise, so time in a finally
+    def decorator(page_function):
+        @functools.wraps(page_function)
+        def wrapper(*args, **kwargs):
+            token = current_page.set(name)
+            start = time.perf_counter()
+            try:
+                return page_function(*args, **kwargs)
+            finally:
+                observe("centr_page_rerun_seconds", time.perf_counter() - start, page=name)
+                current_page.reset(token)
+                maybe_write_textfile()
+        return wrapper
+    return decorator
+
+# (calls, seconds, errors) metric names for each wrapped service
+SERVICE_METRICS = {
+    "neo4j": ("centr_neo4j_queries_total", "centr_neo4j_seconds", "centr_neo4j_errors_total"),
+    "geocoder": ("centr_geocoder_requests_total", "centr_geocoder_seconds", "centr_geocoder_errors_total"),
+}
+
+def _timed_call(service, operation, function, *args, **kwargs):
+    calls, seconds, errors = SERVICE_METRICS[service]
+    labels = {"page": current_page.get(), "operation": operation}
+    start = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    except Exception:
+        increment(errors, **labels)
+        raise
+    finally:
+        increment(calls, **labels)
+        observe(seconds, time.perf_counter() - start, **labels)
+
+class InstrumentedSession:
+    def __init__(self, session):
+        self._session = session
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._session.__exit__(*exc)
+
+    def execute_read(self, transaction_function, *args, **kwargs):
+        return _timed_call("neo4j", transaction_function.__name__, self._session.execute_read, transaction_function, *args, **kwargs)
+
+    def execute_write(self, transaction_function, *args, **kwargs):
+        return _timed_call("neo4j", transaction_function.__name__, self._session.execute_write, transaction_function, *args, **kwargs)
+
+    def run(self, query, parameters=None, **kwargs):
+        return _timed_call("neo4j", "run", self._session.run, query, parameters, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+class InstrumentedDriver:
+    # Drop-in wrapper for a neo4j Driver that counts and times session calls
+    def __init__(self, driver):
+        self._driver = driver
+
+    def session(self, **config):
+        return InstrumentedSession(self._driver.session(**config))
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+class InstrumentedGeocoder:
+    def __init__(self, geocoder):
+        self._geocoder = geocoder
+
+    def geocode(self, query, **kwargs):
+        return _timed_call("geocoder", "geocode", self._geocoder.geocode, query, **kwargs)
+
+    def reverse_geocode(self, lat, lng, **kwargs):
+        return _timed_call("geocoder", "reverse_geocode", self._geocoder.reverse_geocode, lat, lng, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._geocoder, name)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def render_prometheus():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(series) for key, series in _histograms.items()}
+
+    lines = []
+    for name, (metric_type, description) in METRICS.items():
+        if metric_type == "counter":
+            series = sorted((labels, value) for (metric, labels), value in counters.items() if metric == name)
+        else:
+            series = sorted((labels, value) for (metric, labels), value in histograms.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in series:
+            if metric_type == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value[len(LATENCY_BUCKETS)]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-1]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[len(LATENCY_BUCKETS)]}")
+    return "\n".join(lines) + "\n"
+
+def write_textfile(path=METRICS_FILE):
+    # Atomic rewrite, as expected by node_exporter's textfile collector
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+_last_write = 0.0
+
+def maybe_write_textfile():
+    global _last_write
+    if not METRICS_FILE or time.monotonic() - _last_write < METRICS_FILE_INTERVAL:
+        return
+    _last_write = time.monotonic()
+    try:
+        write_textfile(METRICS_FILE)
+    except OSError:
+        pass
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_exporter(port=METRICS_PORT, host="127.0.0.1"):
+    # Streamlit reruns app.py on every interaction, so only the first call binds
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return _server
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from utils.calculations import CATEGORY_DIMENSIONS
+
+# Percentile ranks of a project's category scores among all projects, or among
+# the projects aligned with one Sector. Each cohort keeps a sorted array per
+# category, so a lookup is two binary searches. The arrays are rebuilt in the
+# background after a survey is submitted and every PERCENTILE_REFRESH seconds
+# to pick up other servers' surveys.
+
+PERCENTILE_REFRESH = float(os.getenv('PERCENTILE_REFRESH', '600'))
+# Seconds to wait after a failed build before trying again
+PERCENTILE_RETRY = float(os.getenv('PERCENTILE_RETRY', '30'))
+# Cohort key for every project, whatever its sectors
+ALL_PROJECTS = None
+
+def project_category_scores(tx):
+    # One row per project: its category scores averaged over its responses
+    averages = ", ".join(f"avg(survey.{category}) AS {category}" for category in CATEGORY_DIMENSIONS)
+    query = f"""
+    MATCH (survey:Survey)
+    WHERE survey.projectID IS NOT NULL
+    WITH survey.projectID AS projectID, {averages}
+    OPTIONAL MATCH (project:Project {{projectID: projectID}})-[:ALIGNED_WITH]->(sector:Sector)
+    WHERE sector.type IS NOT NULL
+    RETURN projectID, {", ".join(CATEGORY_DIMENSIONS)}, collect(DISTINCT sector.type) AS sectors
+    """
+    for record in tx.run(query):
+        yield {category: record[category] for category in CATEGORY_DIMENSIONS}, record["sectors"]
+
+def build_distributions(tx):
+    distributions = {}
+    for scores, sectors in project_category_scores(tx):
+        for cohort in [ALL_PROJECTS, *sectors]:
+            cohort_scores = distributions.setdefault(cohort, {category: [] for category in CATEGORY_DIMENSIONS})
+            for category, score in scores.items():
+                if score is not None:
+                    cohort_scores[category].append(score)
+    for cohort_scores in distributions.values():
+        for scores in cohort_scores.values():
+            scores.sort()
+    return distributions
+
+def percentile_rank(sorted_scores, score):
+    # Share of the cohort scoring below, counting ties as half, so the median
+    # project is at 50 whether or not others share its score
+    if not sorted_scores:
+        return None
+    below = bisect_left(sorted_scores, score)
+    ties = bisect_right(sorted_scores, score) - below
+    return 100 * (below + ties / 2) / len(sorted_scores)
+
+class PercentileService:
+    def __init__(self, driver, refresh_seconds=PERCENTILE_REFRESH):
+        self.driver = driver
+        self.refresh_seconds = refresh_seconds
+        self.distributions = None
+        self.built_monotonic = 0.0
+        self.building = False
+        self.failed_monotonic = None
+        # Set when a survey lands during a build, which then runs once more
+        self.stale = False
+        self.lock = threading.Lock()
+        # Held for the first build, which every lookup has to wait for
+        self.first_build_lock = threading.Lock()
+
+    def build(self):
+        try:
+            with self.driver.session() as session:
+                distributions = session.execute_read(build_distributions)
+        except Exception:
+            with self.lock:
+                self.failed_monotonic = time.monotonic()
+            raise
+        with self.lock:
+            # Replaced whole, so readers never see a half-built cohort
+            self.distributions = distributions
+            self.built_monotonic = time.monotonic()
+            self.failed_monotonic = None
+
+    def _backing_off(self):
+        failed = self.failed_monotonic
+        return failed is not None and time.monotonic() - failed < PERCENTILE_RETRY
+
+    def _rebuild_in_background(self):
+        while True:
+            try:
+                self.build()
+            except Exception:
+                # Keep serving the old arrays; retried after PERCENTILE_RETRY
+                pass
+            with self.lock:
+                if not self.stale:
+                    self.building = False
+                    return
+                self.stale = False
+
+    def rebuild(self):
+        with self.lock:
+            if self.building:
+                self.stale = True
+                return
+            self.building = True
+        threading.Thread(target=self._rebuild_in_background, name="percentiles", daemon=True).start()
+
+    def _ensure_built(self):
+        if self.distributions is None:
+            # One caller builds; the others wait for it instead of querying too
+            with self.first_build_lock:
+                if self.distributions is None:
+                    if self._backing_off():
+                        # Callers show no percentiles rather than wait on a failing query
+                        raise RuntimeError("Percentiles are unavailable until the database can be read")
+                    self.build()
+        elif time.monotonic() - self.built_monotonic > self.refresh_seconds and not self._backing_off():
+            self.rebuild()
+
+    def cohorts(self):
+        self._ensure_built()
+        return sorted(cohort for cohort in self.distributions if cohort is not ALL_PROJECTS)
+
+    def percentile(self, category, score, cohort=ALL_PROJECTS):
+        # None when the cohort has no scored projects to compare with
+        self._ensure_built()
+        return percentile_rank(self.distributions.get(cohort, {}).get(category, []), score)
+
+    def cohort_size(self, category, cohort=ALL_PROJECTS):
+        self._ensure_built()
+        return len(self.distributions.get(cohort, {}).get(category, []))
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_percentile_service(driver):
+    # One service per server process, shared by every session
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PercentileService(driver)
+    return _service
+
+def survey_submitted():
+    # Called after a survey is written; a service not built yet will read it from Neo4j
+    if _service is not None and _service.distributions is not None:
+        _service.rebuild()
@@ -0,0 +1,157 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import timedelta
+from utils.metrics import increment
+from utils.unique_id import is_ulid, ulid_time
+
+# In-memory Bloom filter of known projectIDs. The survey's projectID prompt asks
+# it first, so typos and guessed IDs are rejected without a Neo4j round trip and
+# only probable hits are checked against the database.
+
+# Seconds before the filter is rebuilt to pick up projects created by other servers
+PROJECT_FILTER_REFRESH = float(os.getenv('PROJECT_FILTER_REFRESH', '300'))
+PROJECT_FILTER_ERROR_RATE = float(os.getenv('PROJECT_FILTER_ERROR_RATE', '0.001'))
+# Room left for projects created before the next rebuild
+CAPACITY_HEADROOM = 2
+MINIMUM_CAPACITY = 1024
+# Allowance for clock differences between the servers that mint ULIDs
+CLOCK_SLACK = timedelta(minutes=5)
+# Seconds to wait after a failed build before trying again
+PROJECT_FILTER_RETRY = float(os.getenv('PROJECT_FILTER_RETRY', '30'))
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=PROJECT_FILTER_ERROR_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+def count_project_ids(tx):
+    return tx.run("MATCH (project:Project) WHERE project.projectID IS NOT NULL RETURN count(project) AS projects").single()["projects"]
+
+def stream_project_ids(tx, bloom):
+    # Added while the result streams, so the IDs are never held in a list
+    for record in tx.run("MATCH (project:Project) WHERE project.projectID IS NOT NULL RETURN project.projectID AS projectID"):
+        bloom.add(record["projectID"])
+    return bloom
+
+class ProjectIDFilter:
+    def __init__(self, driver, refresh_seconds=PROJECT_FILTER_REFRESH):
+        self.driver = driver
+        self.refresh_seconds = refresh_seconds
+        self.bloom = None
+        self.built_at = None
+        self.built_monotonic = 0.0
+        # IDs added while a build is streaming, replayed into the new filter
+        self.pending = []
+        self.building = False
+        self.failed_monotonic = None
+        self.lock = threading.Lock()
+
+    def build(self):
+        # Callers set `building` first, so only one build streams the projectIDs
+        try:
+            started_at = time.time()
+            started_monotonic = time.monotonic()
+            with self.driver.session() as session:
+                capacity = max(MINIMUM_CAPACITY, session.execute_read(count_project_ids) * CAPACITY_HEADROOM)
+                bloom = session.execute_read(stream_project_ids, BloomFilter(capacity))
+            with self.lock:
+                for project_id in self.pending:
+                    bloom.add(project_id)
+                self.bloom = bloom
+                self.built_at = started_at
+                self.built_monotonic = started_monotonic
+                self.failed_monotonic = None
+        except Exception:
+            with self.lock:
+                self.failed_monotonic = time.monotonic()
+            raise
+        finally:
+            with self.lock:
+                self.building = False
+                self.pending = []
+
+    def _rebuild_in_background(self):
+        try:
+            self.build()
+        except Exception:
+            # Keep serving the old filter, if any; retried after PROJECT_FILTER_RETRY
+            pass
+
+    def refresh_if_stale(self):
+        # Starts the first build too; lookups never wait for one
+        now = time.monotonic()
+        with self.lock:
+            if self.building:
+                return
+            if self.failed_monotonic is not None and now - self.failed_monotonic < PROJECT_FILTER_RETRY:
+                return
+            if self.bloom is not None and now - self.built_monotonic <= self.refresh_seconds:
+                return
+            self.building = True
+        threading.Thread(target=self._rebuild_in_background, name="project-id-filter", daemon=True).start()
+
+    def add(self, project_id):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(project_id)
+            if self.building:
+                self.pending.append(project_id)
+
+    def might_exist(self, project_id):
+        # False only when the project certainly does not exist
+        self.refresh_if_stale()
+        bloom = self.bloom
+        if bloom is None:
+            # Still building, or the database is unreachable
+            increment("centr_project_id_filter_total", result="unavailable")
+            return True
+        if project_id in bloom:
+            increment("centr_project_id_filter_total", result="probable")
+            return True
+        # Another server may have created the project since the filter was built;
+        # its ULID says when, so only those recent IDs go to the database.
+        # Future-dated IDs beyond the clock slack cannot have been issued yet.
+        if is_ulid(project_id):
+            created = ulid_time(project_id).timestamp()
+            slack = CLOCK_SLACK.total_seconds()
+            if self.built_at - slack <= created <= time.time() + slack:
+                increment("centr_project_id_filter_total", result="recent")
+                return True
+        increment("centr_project_id_filter_total", result="rejected")
+        return False
+
+_filter = None
+_filter_lock = threading.Lock()
+
+def get_project_id_filter(driver):
+    # One filter per server process, shared by every session and page
+    global _filter
+    with _filter_lock:
+        if _filter is None:
+            _filter = ProjectIDFilter(driver)
+            # Built in the background from the first request on
+            _filter.refresh_if_stale()
+    return _filter
+
+def remember_project_id(project_id):
+    # Called after a project is created; a filter not built yet will load it from Neo4j
+    if _filter is not None:
+        _filter.add(project_id)
@@ -0,0 +1,204 @@
+import os
+import re
+import threading
+import time
+from utils.unique_id import TIME_LENGTH
+
+# In-memory lookup of projects by projectID or title for the survey's projectID
+# prompt. A prefix trie finds IDs from their first characters and trigram
+# indexes find IDs within a few typos and titles from any fragment. Everything
+# is built from one streaming query, updated as projects are created and
+# rebuilt in the background to pick up other servers' projects.
+
+# Seconds before the index is rebuilt to pick up projects created by other servers
+PROJECT_LOOKUP_REFRESH = float(os.getenv('PROJECT_LOOKUP_REFRESH', '300'))
+# Seconds to wait after a failed build before trying again
+PROJECT_LOOKUP_RETRY = float(os.getenv('PROJECT_LOOKUP_RETRY', '30'))
+# Typed IDs must be this long before prefix or typo suggestions are offered.
+# A ULID's first TIME_LENGTH characters are just its creation time, which anyone
+# can guess, so the query must also include some of the random part or the
+# prompt could be used to list projectIDs created at a given time.
+MINIMUM_ID_QUERY = TIME_LENGTH + 6
+MAXIMUM_TYPOS = 2
+# ID trigrams shared by more projects than this are skipped by the typo search
+COMMON_ID_TRIGRAM = 64
+MINIMUM_TITLE_QUERY = 3
+
+def edit_distance(a, b, limit):
+    # Levenshtein distance, giving up once every path is over `limit`
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class PrefixTrie:
+    def __init__(self):
+        self.root = {}
+
+    def add(self, key, value):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault("", []).append(value)
+
+    def search(self, prefix, limit):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        found, stack = [], [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            found.extend(node.get("", []))
+            stack.extend(child for char, child in sorted(node.items(), reverse=True) if char)
+        return found[:limit]
+
+def trigrams(text):
+    text = f"  {re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    def __init__(self):
+        self.postings = {}
+        self.sizes = {}
+
+    def add(self, text, value):
+        grams = trigrams(text)
+        self.sizes[value] = len(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(value)
+
+    def search(self, text, limit, max_postings=None):
+        grams = trigrams(text)
+        shared = {}
+        for gram in grams:
+            postings = self.postings.get(gram, ())
+            if max_postings is not None and len(postings) > max_postings:
+                # Too common to tell entries apart, such as a ULID's time prefix
+                continue
+            for value in postings:
+                shared[value] = shared.get(value, 0) + 1
+        # Dice coefficient, so short titles that contain the query rank first
+        scored = [(2 * count / (len(grams) + self.sizes[value]), value) for value, count in shared.items()]
+        scored.sort(key=lambda match: match[0], reverse=True)
+        return [(score, value) for score, value in scored[:limit] if score >= 0.3]
+
+def project_rows(tx):
+    query = """
+    MATCH (project:Project)
+    WHERE project.projectID IS NOT NULL
+    RETURN project.projectID AS projectID, coalesce(project.title, project.project_name, '') AS title
+    """
+    for record in tx.run(query):
+        yield record["projectID"], record["title"]
+
+class ProjectLookup:
+    def __init__(self):
+        self.titles = {}
+        self.ids = PrefixTrie()
+        self.id_index = TrigramIndex()
+        self.title_index = TrigramIndex()
+        self.lock = threading.Lock()
+
+    def add(self, project_id, title):
+        with self.lock:
+            if project_id in self.titles:
+                return
+            self.titles[project_id] = title or ""
+            # IDs are compared case-insensitively, as typed IDs are
+            self.ids.add(project_id.upper(), project_id)
+            self.id_index.add(project_id, project_id)
+            if title:
+                self.title_index.add(title, project_id)
+
+    def _candidate(self, project_id, match):
+        return {"projectID": project_id, "title": self.titles[project_id], "match": match}
+
+    def search_id(self, text, limit=5):
+        key = text.strip().upper()
+        if len(key) < MINIMUM_ID_QUERY:
+            return []
+        with self.lock:
+            candidates = [self._candidate(project_id, "prefix") for project_id in self.ids.search(key, limit)]
+            # Each typo changes at most three trigrams, so the right ID still shares
+            # most of them; only those few candidates get an exact edit distance
+            typos = []
+            for _, project_id in self.id_index.search(key, limit * 4, COMMON_ID_TRIGRAM):
+                distance = edit_distance(key, project_id.upper(), MAXIMUM_TYPOS)
+                if distance <= MAXIMUM_TYPOS and all(candidate["projectID"] != project_id for candidate in candidates):
+                    typos.append((distance, project_id))
+            for distance, project_id in sorted(typos)[:limit - len(candidates)]:
+                candidates.append(self._candidate(project_id, f"{distance} typo{'s' if distance > 1 else ''}"))
+        return candidates
+
+    def search_title(self, text, limit=5):
+        if len(text.strip()) < MINIMUM_TITLE_QUERY:
+            return []
+        with self.lock:
+            return [self._candidate(project_id, "title") for _, project_id in self.title_index.search(text, limit)]
+
+def load_projects(tx, lookup):
+    for project_id, title in project_rows(tx):
+        lookup.add(project_id, title)
+    return lookup
+
+def build_project_lookup(driver):
+    with driver.session() as session:
+        return session.execute_read(load_projects, ProjectLookup())
+
+_lookup = None
+_built_at = 0.0
+_failed_at = None
+_rebuilding = False
+# Projects created on this server while a build runs, replayed into the new index
+_pending = []
+_lookup_lock = threading.Lock()
+
+def _rebuild(driver):
+    global _lookup, _built_at, _failed_at, _rebuilding, _pending
+    try:
+        lookup = build_project_lookup(driver)
+        with _lookup_lock:
+            # The build's query may have started before these were written
+            for project_id, title in _pending:
+                lookup.add(project_id, title)
+            _lookup, _built_at, _failed_at = lookup, time.monotonic(), None
+    except Exception:
+        with _lookup_lock:
+            # Keep serving the old index, if any; retried after PROJECT_LOOKUP_RETRY
+            _failed_at = time.monotonic()
+    finally:
+        with _lookup_lock:
+            _rebuilding = False
+            _pending = []
+
+def get_project_lookup(driver, refresh_seconds=PROJECT_LOOKUP_REFRESH):
+    # One index per server process, built and rebuilt in the background so no
+    # session waits on the query. None until the first build finishes, and
+    # callers offer no suggestions until then.
+    global _rebuilding
+    now = time.monotonic()
+    with _lookup_lock:
+        stale = _lookup is None or now - _built_at > refresh_seconds
+        backing_off = _failed_at is not None and now - _failed_at < PROJECT_LOOKUP_RETRY
+        if stale and not backing_off and not _rebuilding:
+            _rebuilding = True
+            threading.Thread(target=_rebuild, args=(driver,), name="project-lookup", daemon=True).start()
+        return _lookup
+
+def remember_project(project_id, title):
+    # Called after a project is created; a build in progress gets it replayed
+    with _lookup_lock:
+        if _rebuilding:
+            _pending.append((project_id, title))
+        lookup = _lookup
+    if lookup is not None:
+        lookup.add(project_id, title)
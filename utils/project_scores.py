@@ -0,0 +1,64 @@
+import os
+import threading
+import pyarrow as pa
+from utils.arrow_io import SURVEY_SCHEMA, query_to_dataframe, return_properties
+from utils.calculations import CATEGORY_DIMENSIONS, DIMENSIONS, project_badge_data
+
+# Read path for a project's scores on the "Check and Generate Scores" page.
+# Results are cached per projectID in pages/scores.py; the cache key includes a
+# per-project version that submit_survey bumps, so a new response is visible
+# straight away on this server and other servers pick it up after SCORES_TTL.
+
+SCORES_TTL = int(os.getenv('SCORES_TTL', '600'))
+# Bounds the cache, since old versions stay in it until they expire
+SCORES_CACHE_ENTRIES = 1024
+
+def project_scores(tx, projectID):
+    # Category scores are averaged over the project's responses; dimension
+    # scores are kept on the Project node by the latest response
+    averages = ",\n        ".join(f"avg(survey.{category}) AS {category}" for category in CATEGORY_DIMENSIONS)
+    query = f"""
+    MATCH (project:Project {{projectID: $projectID}})
+    WITH collect(project) AS projects
+    WHERE size(projects) > 0
+    OPTIONAL MATCH (survey:Survey {{projectID: $projectID}})
+    WITH projects, count(survey) AS respondents,
+        {averages}
+    RETURN respondents,
+        {", ".join(CATEGORY_DIMENSIONS)},
+        head([project IN projects WHERE project.context_score IS NOT NULL] + projects) AS project
+    """
+    record = tx.run(query, projectID=projectID).single()
+    if record is None:
+        return None
+    project = record["project"]
+    return {
+        "respondents": record["respondents"],
+        "categories": {category: record[category] for category in CATEGORY_DIMENSIONS},
+        "dimensions": {dimension: project.get(f"{dimension}_score") for dimension in DIMENSIONS},
+        # Drawn from the Project's stored category scores, as batch_badges does
+        "badge": project_badge_data(project),
+    }
+
+RESPONSE_SCHEMA = pa.schema([SURVEY_SCHEMA.field(name) for name in ("response_id", "connection", *CATEGORY_DIMENSIONS)])
+
+def project_responses(tx, projectID):
+    # One row per respondent, as a DataFrame with Arrow dtypes
+    query = f"""
+    MATCH (survey:Survey {{projectID: $projectID}})
+    RETURN {return_properties('survey', RESPONSE_SCHEMA)}
+    ORDER BY survey.response_id
+    """
+    return query_to_dataframe(tx, query, RESPONSE_SCHEMA, {"projectID": projectID})
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+def scores_version(projectID):
+    with _versions_lock:
+        return _versions.get(projectID, 0)
+
+def invalidate_project_scores(projectID):
+    # Called after a survey is written, so the next lookup misses the cache
+    with _versions_lock:
+        _versions[projectID] = _versions.get(projectID, 0) + 1
@@ -0,0 +1,125 @@
+import atexit
+import hashlib
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Chart and badge rendering is CPU bound and holds the GIL, so it runs in a
+# small process pool instead of on the Streamlit script threads. Jobs must be
+# top-level functions that take picklable arguments and return image bytes.
+
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', max(1, min(4, (os.cpu_count() or 2) - 1))))
+RENDER_TIMEOUT = float(os.getenv('RENDER_TIMEOUT', 30))
+# Extra seconds the caller waits for a worker to stop its own timed-out job
+RENDER_GRACE = 5
+
+_executor = None
+_executor_lock = threading.Lock()
+# Workers of the current pool stuck in a job that even the alarm could not stop
+_hung_workers = 0
+
+# Identical jobs submitted while one is still running share its future
+_in_flight = {}
+_in_flight_lock = threading.RLock()
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork so workers don't inherit the server's threads and sockets
+            _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def shutdown():
+    global _executor, _hung_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+            _hung_workers = 0
+
+atexit.register(shutdown)
+
+def _run_with_alarm(timeout, func, args, kwargs):
+    # Runs in a worker. The alarm interrupts a job that overruns, so the worker
+    # is free again without touching jobs other sessions have in the pool.
+    if timeout is None or not hasattr(signal, "SIGALRM"):
+        return func(*args, **kwargs)
+
+    def expire(signum, frame):
+        raise TimeoutError(f"Render took longer than {timeout:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _job_key(func, args, kwargs):
+    payload = pickle.dumps((func.__module__, func.__qualname__, args, sorted(kwargs.items())))
+    return hashlib.sha256(payload).hexdigest()
+
+def _forget(key, future):
+    with _in_flight_lock:
+        if _in_flight.get(key, (None,))[0] is future:
+            del _in_flight[key]
+
+def _submit(func, args, kwargs, timeout):
+    key = _job_key(func, args, kwargs)
+    with _in_flight_lock:
+        job = _in_flight.get(key)
+        if job is None:
+            executor = get_executor()
+            job = (executor.submit(_run_with_alarm, timeout, func, args, kwargs), executor)
+            _in_flight[key] = job
+            job[0].add_done_callback(lambda done: _forget(key, done))
+    return job
+
+def submit(func, *args, **kwargs):
+    return _submit(func, args, kwargs, None)[0]
+
+def _worker_recovered(executor):
+    global _hung_workers
+    with _executor_lock:
+        if executor is _executor:
+            _hung_workers -= 1
+
+def _worker_hung(executor, future):
+    # Only once every worker is stuck is nothing else running in the pool; then
+    # it is replaced, and its queued jobs would never have started anyway
+    global _executor, _hung_workers
+    with _executor_lock:
+        if executor is not _executor:
+            return
+        _hung_workers += 1
+        replace = _hung_workers >= RENDER_WORKERS
+        if replace:
+            _executor, _hung_workers = None, 0
+    if replace:
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        # A job that finishes after all frees its worker again
+        future.add_done_callback(lambda done: _worker_recovered(executor))
+
+def render(func, *args, timeout=RENDER_TIMEOUT, **kwargs):
+    # Raises concurrent.futures.TimeoutError if the job takes longer than `timeout`.
+    # The worker stops the job itself; a job that cannot be interrupted counts
+    # its worker as hung, and other sessions' jobs carry on.
+    future, executor = _submit(func, args, kwargs, timeout)
+    try:
+        return future.result(timeout=None if timeout is None else timeout + RENDER_GRACE)
+    except TimeoutError:
+        # A job still queued is just dropped; one still running holds a worker
+        if not future.cancel() and not future.done():
+            _worker_hung(executor, future)
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        shutdown()
+        raise
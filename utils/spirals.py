@@ -0,0 +1,73 @@
+import numpy as np
+
+# NumPy versions of vogel_spiral, archimedean_spiral, prepare_vogel and
+# prep_arch from visualization_functions.R. Instead of repeating one row per
+# point, groups are kept as run-length (group, start, stop) ranges over the
+# point sequence and coordinates are only computed for the points drawn.
+
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+# More points than this cannot be told apart on a badge-sized plot
+DEFAULT_MAX_POINTS = 2000
+
+def lod_positions(n, max_points=DEFAULT_MAX_POINTS):
+    # Evenly spaced subsample of the positions 0..n-1 once n exceeds max_points
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(np.int64))
+
+def vogel_spiral(n, positions=None):
+    if positions is None:
+        positions = np.arange(n)
+    t = positions + 1.0
+    r = np.sqrt(t)
+    theta = t * GOLDEN_ANGLE
+    return r * np.cos(theta), r * np.sin(theta)
+
+def archimedean_spiral(n, a=0, b=1, turns=3, positions=None):
+    # b is the separation of turns
+    if positions is None:
+        positions = np.arange(n)
+    step = turns * 2 * np.pi / (n - 1) if n > 1 else 0.0
+    t = positions * step
+    return (a + b * t) * np.cos(t), (a + b * t) * np.sin(t)
+
+def group_runs(groups, counts, positions=None):
+    # Map per-group point counts onto (group, start, stop) ranges; with a
+    # subsample the ranges index into the sampled positions instead
+    stops = np.cumsum(np.asarray(counts, dtype=np.int64))
+    starts = stops - np.asarray(counts, dtype=np.int64)
+    if positions is not None:
+        starts = np.searchsorted(positions, starts)
+        stops = np.searchsorted(positions, stops)
+    return [(group, int(start), int(stop)) for group, start, stop in zip(groups, starts, stops) if stop > start]
+
+def _prepare(spiral, groups, counts, max_points, **spiral_args):
+    counts = [int(count) for count in counts]
+    n = sum(counts)
+    positions = lod_positions(n, max_points)
+    x, y = spiral(n, positions=positions, **spiral_args)
+    return {
+        "x": x,
+        "y": y,
+        "runs": group_runs(groups, counts, positions if len(positions) < n else None),
+        "total_points": n,
+    }
+
+def prepare_vogel(ripple, max_points=DEFAULT_MAX_POINTS):
+    # `ripple` is the output of utils.calculations.calculate_ripple
+    return _prepare(
+        vogel_spiral,
+        [row["group"] for row in ripple],
+        [row["adj_score"] for row in ripple],
+        max_points,
+    )
+
+def prep_arch(composite, max_points=DEFAULT_MAX_POINTS):
+    # `composite` is the output of utils.calculations.prep_composite
+    return _prepare(
+        archimedean_spiral,
+        [row["category"] for row in composite],
+        [row["adj_score"] for row in composite],
+        max_points,
+    )
@@ -0,0 +1,66 @@
+import json
+from utils.calculations import CATEGORY_DIMENSIONS, DEGREE_FIELDS, DIMENSIONS
+
+# One object per survey session instead of dozens of loose st.session_state keys.
+# __slots__ keeps instances small and turns misspelled field names into errors.
+
+ALIGNMENT_FIELDS = (
+    "alignment_goals",
+    "alignment_values",
+    "alignment_roles",
+    "alignment_resources",
+    "alignment_activities",
+    "alignment_culture",
+    "alignment_outputs",
+    "alignment_outcomes",
+)
+
+DIMENSION_FIELDS = tuple(f"{dimension}_score" for dimension in DIMENSIONS)
+
+CATEGORY_FIELDS = tuple(CATEGORY_DIMENSIONS)
+
+# Stored on the Project/Survey nodes as JSON strings
+JSON_FIELDS = ("partners", "selected_scores", "direct_indicator_preferences") + DEGREE_FIELDS
+
+class SurveyResponse:
+    __slots__ = (
+        "projectID",
+        "project_name",
+        "response_id",
+        "connection",
+        "partners",
+        "selected_scores",
+        "direct_indicator_preferences",
+    ) + ALIGNMENT_FIELDS + DIMENSION_FIELDS + CATEGORY_FIELDS + DEGREE_FIELDS
+
+    def __init__(self, projectID=''):
+        self.projectID = projectID
+        self.project_name = ''
+        self.response_id = ''
+        self.connection = None
+        self.partners = []
+        self.selected_scores = []
+        self.direct_indicator_preferences = {}
+        for name in ALIGNMENT_FIELDS:
+            setattr(self, name, 0.5)
+        for name in DIMENSION_FIELDS + CATEGORY_FIELDS:
+            setattr(self, name, 0.0)
+        for name in DEGREE_FIELDS:
+            setattr(self, name, {})
+
+    def update(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def update_category_scores(self):
+        for category, dimensions in CATEGORY_DIMENSIONS.items():
+            setattr(self, category, sum(getattr(self, f"{dimension}_score") for dimension in dimensions))
+
+    def to_db_payload(self):
+        # Parameters for create_survey_in_db
+        payload = {name: getattr(self, name) for name in self.__slots__}
+        for name in JSON_FIELDS:
+            payload[name] = json.dumps(payload[name])
+        payload["unique_id"] = self.projectID
+        payload["score_visualizations"] = payload.pop("selected_scores")
+        return payload
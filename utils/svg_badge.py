@@ -0,0 +1,133 @@
+import math
+from datetime import date
+from html import escape
+from string import Template
+from utils.badge_cache import badge_cache_key, read_cached_badge, write_cached_badge
+from utils.badge_style import (
+    BORDER_COLOR, CREDIT_TEXT, IU_PALETTE, LABEL_COLORS, LABEL_IMPACTS, TEXT_COLOR, rescale,
+)
+
+# The compile_badge layout (donut, raw impact bar, label line and credit line)
+# written straight to SVG from string templates. Uses only the standard library,
+# so a badge can be served without importing matplotlib or running R.
+
+WIDTH = 800
+# compile_badge stacks its rows with heights 8, 1, 1, 1 on an 8x8 inch canvas
+ROW_HEIGHT = WIDTH / 11
+DONUT_CENTER = (WIDTH / 2, ROW_HEIGHT * 4)
+DONUT_OUTER = ROW_HEIGHT * 2.6
+DONUT_INNER = DONUT_OUTER / 2
+LABEL_RADIUS = DONUT_OUTER * 1.12
+BAR_TOP = ROW_HEIGHT * 8 + ROW_HEIGHT * 0.15
+BAR_HEIGHT = ROW_HEIGHT * 0.7
+BAR_MARGIN = 40
+LABELS_Y = ROW_HEIGHT * 9.5
+CREDIT_Y = ROW_HEIGHT * 10.5
+
+DOCUMENT = Template("""<svg xmlns="http://www.w3.org/2000/svg" width="$width" height="$width" viewBox="0 0 $width $width" font-family="Helvetica, Arial, sans-serif">
+$wedges
+<text x="$cx" y="$cy" text-anchor="middle" dominant-baseline="central" font-size="96" fill="$text_color">$overall</text>
+$wedge_labels
+$bars
+<text x="$half" y="$labels_y" text-anchor="middle" dominant-baseline="central" font-size="15" fill="$text_color">$label_spans</text>
+<text x="$half" y="$credit_y" text-anchor="middle" dominant-baseline="central" font-size="10" fill="$text_color">$credit</text>
+</svg>
+""")
+
+WEDGE = Template('<path d="$path" fill="$color" stroke="$border" stroke-width="1"/>')
+
+WEDGE_LABEL = Template('<text x="$x" y="$y" text-anchor="$anchor" font-size="15" fill="$text_color"><tspan x="$x">$name</tspan><tspan x="$x" dy="18">$index</tspan></text>')
+
+BAR = Template('<rect x="$x" y="$y" width="$width" height="$height" fill="$color" stroke="$border" stroke-width="1"/>')
+
+LABEL_SPAN = Template('<tspan fill="$color" fill-opacity="0.53">&#9608;</tspan> <tspan fill="$color" font-weight="bold">$number</tspan> $impact ')
+
+def _point(radius, angle):
+    # Angles are clockwise from twelve o'clock, like the donut in compile_badge
+    cx, cy = DONUT_CENTER
+    return cx + radius * math.sin(angle), cy - radius * math.cos(angle)
+
+def _fmt(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+def _wedge_path(start, end):
+    large_arc = 1 if end - start > math.pi else 0
+    outer_start, outer_end = _point(DONUT_OUTER, start), _point(DONUT_OUTER, end)
+    inner_end, inner_start = _point(DONUT_INNER, end), _point(DONUT_INNER, start)
+    return (
+        f"M {_fmt(outer_start[0])} {_fmt(outer_start[1])} "
+        f"A {_fmt(DONUT_OUTER)} {_fmt(DONUT_OUTER)} 0 {large_arc} 1 {_fmt(outer_end[0])} {_fmt(outer_end[1])} "
+        f"L {_fmt(inner_end[0])} {_fmt(inner_end[1])} "
+        f"A {_fmt(DONUT_INNER)} {_fmt(DONUT_INNER)} 0 {large_arc} 0 {_fmt(inner_start[0])} {_fmt(inner_start[1])} Z"
+    )
+
+def donut_svg(category_scores):
+    scores = [score["category_index"] for score in category_scores]
+    total = sum(scores)
+    if not total:
+        scores, total = [1] * len(scores), len(scores)
+
+    wedges, labels = [], []
+    start = 0.0
+    for score, value, color in zip(category_scores, scores, IU_PALETTE):
+        sweep = 2 * math.pi * value / total
+        if sweep <= 0:
+            continue
+        # An SVG arc cannot close on itself, so a full ring is drawn as two halves
+        halves = [(start, start + sweep / 2), (start + sweep / 2, start + sweep)] if sweep > math.pi else [(start, start + sweep)]
+        for arc_start, arc_end in halves:
+            wedges.append(WEDGE.substitute(path=_wedge_path(arc_start, arc_end), color=color, border=BORDER_COLOR))
+        if score["category_index"]:
+            x, y = _point(LABEL_RADIUS, start + sweep / 2)
+            labels.append(WEDGE_LABEL.substitute(
+                x=_fmt(x), y=_fmt(y),
+                anchor="start" if x > DONUT_CENTER[0] + 1 else "end" if x < DONUT_CENTER[0] - 1 else "middle",
+                name=escape(str(score["category_name"])), index=score["category_index"], text_color=TEXT_COLOR,
+            ))
+        start += sweep
+    return "\n".join(wedges), "\n".join(labels)
+
+def raw_bar_svg(category_scores):
+    values = rescale([score["category_impact_number"] for score in category_scores], 3, 100)
+    scale = (WIDTH - 2 * BAR_MARGIN) / sum(values)
+    bars = []
+    x = BAR_MARGIN
+    for value, color in zip(values, IU_PALETTE):
+        bars.append(BAR.substitute(x=_fmt(x), y=_fmt(BAR_TOP), width=_fmt(value * scale), height=_fmt(BAR_HEIGHT), color=color, border=BORDER_COLOR))
+        x += value * scale
+    return "\n".join(bars)
+
+def labels_svg(category_scores):
+    return "".join(
+        LABEL_SPAN.substitute(color=color, number=score["category_impact_number"], impact=impact)
+        for score, color, impact in zip(category_scores, LABEL_COLORS, LABEL_IMPACTS)
+    ).strip()
+
+def compile_svg_badge(badge_data, generated=None):
+    category_scores = badge_data["category_scores"]
+    wedges, wedge_labels = donut_svg(category_scores)
+    return DOCUMENT.substitute(
+        width=WIDTH,
+        half=_fmt(WIDTH / 2),
+        cx=_fmt(DONUT_CENTER[0]),
+        cy=_fmt(DONUT_CENTER[1]),
+        text_color=TEXT_COLOR,
+        overall=escape(str(badge_data["overall"])),
+        wedges=wedges,
+        wedge_labels=wedge_labels,
+        bars=raw_bar_svg(category_scores),
+        labels_y=_fmt(LABELS_Y),
+        label_spans=labels_svg(category_scores),
+        credit_y=_fmt(CREDIT_Y),
+        credit=escape(CREDIT_TEXT.format(date=generated or date.today().isoformat())),
+    )
+
+def render_svg_badge(badge_data):
+    # Cached as the SVG of utils.badge's "badge" layout, which render_badge
+    # and batch_badges serve from here
+    key = badge_cache_key(badge_data, "badge")
+    content = read_cached_badge(key, "svg")
+    if content is None:
+        content = compile_svg_badge(badge_data).encode("utf-8")
+        write_cached_badge(key, "svg", content)
+    return content
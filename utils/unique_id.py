@@ -1,4 +1,94 @@
 import secrets
+import threading
+import time
+from datetime import datetime, timezone
 
 def generate_unique_id(length):
     return secrets.token_hex(length)
+
+# ULID-style IDs: a 48-bit millisecond timestamp followed by 80 random bits,
+# written as 26 Crockford base32 characters. They sort by creation time, so new
+# projects and responses land at the end of the projectID/response_id indexes
+# and "created since" queries become index range scans.
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_LENGTH = 26
+TIME_LENGTH = 10
+RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last_time = -1
+_last_random = 0
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(CROCKFORD[digit])
+    return "".join(reversed(chars))
+
+def _next(timestamp_ms):
+    # IDs made in the same millisecond increment the random part, so they still
+    # sort in the order they were generated
+    global _last_time, _last_random
+    if timestamp_ms <= _last_time:
+        timestamp_ms = _last_time
+        _last_random += 1
+        if _last_random >> RANDOM_BITS:
+            # 2^80 IDs in one millisecond; borrow the next one
+            timestamp_ms += 1
+            _last_random = secrets.randbits(RANDOM_BITS - 1)
+    else:
+        # One bit of headroom keeps the increments from overflowing
+        _last_random = secrets.randbits(RANDOM_BITS - 1)
+    _last_time = timestamp_ms
+    return _encode(timestamp_ms, TIME_LENGTH) + _encode(_last_random, ULID_LENGTH - TIME_LENGTH)
+
+def generate_ulid():
+    with _lock:
+        return _next(time.time_ns() // 1_000_000)
+
+def generate_ulids(count):
+    # For bulk imports: one clock read, consecutive and strictly increasing IDs
+    with _lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        return [_next(timestamp_ms) for _ in range(count)]
+
+def is_ulid(value):
+    # 48 bits of time leave the first character at most 7
+    return len(value) == ULID_LENGTH and value[0] in CROCKFORD[:8] and all(char in CROCKFORD for char in value.upper())
+
+def normalize_id(value):
+    # Crockford base32 is case-insensitive; older hex IDs are left as typed
+    value = value.strip()
+    return value.upper() if is_ulid(value) else value
+
+def ulid_time(ulid):
+    timestamp_ms = 0
+    for char in ulid[:TIME_LENGTH].upper():
+        timestamp_ms = timestamp_ms * 32 + CROCKFORD.index(char)
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+
+def ulid_lower_bound(moment):
+    # Smallest ULID created at or after `moment`, for `id >= $since` range scans
+    return _encode(int(moment.timestamp() * 1000), TIME_LENGTH) + "0" * (ULID_LENGTH - TIME_LENGTH)
+
+def reserve_id_in_db(tx, unique_id):
+    # Relies on the reserved_id_unique constraint in database.cypher; a
+    # duplicate makes the CREATE fail with a ConstraintError
+    tx.run("CREATE (:ReservedID {id: $id, reservedAt: datetime()})", id=unique_id)
+
+def reserve_ulid(driver, attempts=3):
+    # Optional: guarantee uniqueness across servers by recording the ID first.
+    # A collision needs two servers to draw the same 80 random bits in one
+    # millisecond, so a retry is effectively never needed.
+    from neo4j.exceptions import ConstraintError
+    for attempt in range(attempts):
+        unique_id = generate_ulid()
+        try:
+            with driver.session() as session:
+                session.execute_write(reserve_id_in_db, unique_id)
+            return unique_id
+        except ConstraintError:
+            if attempt == attempts - 1:
+                raise